@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'Osool Helpdesk',
-    'version': '19.0.1.0.4',
+    'version': '19.0.1.0.6',
     'category': 'Services/Helpdesk',
     'summary': 'Custom Enterprise Helpdesk Extension for Case Management',
     'description': """
@@ -44,6 +44,8 @@
         'data/helpdesk_team_data.xml',
         'data/helpdesk_subcategory_data.xml',
         'data/website_page_security.xml',
+        'data/ir_cron_data.xml',
+        'data/mail_templates.xml',
         
         # 'data/helpdesk_sla_data.xml',  # TODO: Fix SLA data
         # 'data/mail_template_data.xml',  # TODO: Fix template data
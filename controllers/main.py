@@ -1,17 +1,123 @@
 # -*- coding: utf-8 -*-
-from odoo import http
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime
+
+from werkzeug.exceptions import BadRequest
+
+from odoo import api, http
 from odoo.http import request
 from odoo.exceptions import AccessError
+from odoo.tools.misc import xlsxwriter
 from odoo.addons.website.controllers.main import Website
 
 
 class HelpdeskController(http.Controller):
     """
     Custom Helpdesk Controller
-    Note: Ticket creation routes are handled in controllers/portal.py
-    This controller is reserved for future custom endpoints.
+    Note: Portal ticket creation routes are handled in controllers/portal.py
     """
-    pass
-
-
-
+    
+    # Rows encoded per chunk sent to the client
+    _export_chunk_rows = 1000
+    # Largest batch accepted by the conversation intake API
+    _intake_max_batch = 1000
+    
+    @http.route('/helpdesk/api/conversations', type='http', auth='bearer', methods=['POST'], csrf=False, save_session=False)
+    def intake_conversations(self, **kw):
+        """Batched ticket intake for Genesys and other channels.
+        Body: a JSON array of conversations, or {"conversations": [...]}; each conversation
+        needs a conversation_id. A known conversation updates its ticket instead of creating one.
+        Authenticate with an API key: ``Authorization: Bearer <key>``.
+        """
+        try:
+            payload = request.get_json_data()
+        except ValueError:
+            return request.make_json_response({'error': 'Invalid JSON body'}, status=400)
+        conversations = payload.get('conversations') if isinstance(payload, dict) else payload
+        if not isinstance(conversations, list):
+            return request.make_json_response({'error': 'Expected a list of conversations'}, status=400)
+        if len(conversations) > self._intake_max_batch:
+            return request.make_json_response({
+                'error': 'At most %s conversations per request' % self._intake_max_batch,
+            }, status=413)
+        results = request.env['helpdesk.ticket']._intake_conversations(conversations)
+        return request.make_json_response({'results': results})
+    
+    @http.route('/helpdesk/ticket/export/<string:file_format>', type='http', auth='user', methods=['GET'])
+    def export_raw_data(self, file_format, domain='[]', **kw):
+        """Stream the Raw Data Export of tickets matching domain as CSV or XLSX.
+        Rows are read in chunks from a dedicated cursor while the response is being
+        sent, so worker memory does not grow with the number of tickets.
+        """
+        if file_format not in ('csv', 'xlsx'):
+            raise request.not_found()
+        try:
+            domain = json.loads(domain)
+        except ValueError:
+            raise BadRequest('Invalid domain')
+        if not isinstance(domain, list):
+            raise BadRequest('Invalid domain')
+        request.env['helpdesk.ticket'].check_access('read')
+        
+        registry = request.env.registry
+        uid = request.env.uid
+        context = dict(request.env.context)
+        
+        def rows():
+            with registry.cursor(readonly=True) as cr:
+                env = api.Environment(cr, uid, context)
+                for row in env['helpdesk.ticket']._raw_export_rows(domain):
+                    yield row
+        
+        filename = 'helpdesk_raw_data_%s.%s' % (datetime.now().strftime('%Y%m%d_%H%M%S'), file_format)
+        if file_format == 'csv':
+            stream = self._stream_csv(rows())
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            stream = self._stream_xlsx(rows())
+            content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        return request.make_response(stream, headers=[
+            ('Content-Type', content_type),
+            ('Content-Disposition', http.content_disposition(filename)),
+        ])
+    
+    def _stream_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # BOM so that Excel opens the UTF-8 file with the right encoding
+        buffer.write('\ufeff')
+        for index, row in enumerate(rows, 1):
+            writer.writerow([
+                value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+                for value in row
+            ])
+            if index % self._export_chunk_rows == 0:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+    
+    def _stream_xlsx(self, rows):
+        # constant_memory flushes every row to a temporary file as soon as it is written
+        with tempfile.TemporaryFile() as output:
+            workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'in_memory': False})
+            worksheet = workbook.add_worksheet('Raw Data')
+            header_format = workbook.add_format({'bold': True})
+            datetime_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+            for row_index, row in enumerate(rows):
+                for col_index, value in enumerate(row):
+                    if row_index == 0:
+                        worksheet.write_string(row_index, col_index, value, header_format)
+                    elif isinstance(value, datetime):
+                        worksheet.write_datetime(row_index, col_index, value, datetime_format)
+                    elif value is None or value is False:
+                        worksheet.write_blank(row_index, col_index, None)
+                    else:
+                        worksheet.write(row_index, col_index, value)
+            workbook.close()
+            output.seek(0)
+            while chunk := output.read(64 * 1024):
+                yield chunk
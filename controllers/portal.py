@@ -1,66 +1,146 @@
 # -*- coding: utf-8 -*-
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from urllib.parse import urlencode
+
+import psycopg2
+
 from odoo import http
 from odoo.http import request
-from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+from odoo.addons.portal.controllers.portal import CustomerPortal
+
+
+SUBMISSION_TOKEN_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class SubmitRateLimiter:
+    """Sliding-window limit of portal ticket submissions per partner.
+
+    The history lives in the worker's memory, so the limit applies per worker
+    process; it is meant to absorb bursts, not to enforce an exact quota.
+    """
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._history = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def allow(self, partner_id):
+        now = time.monotonic()
+        with self._lock:
+            history = self._history[partner_id]
+            while history and history[0] <= now - self.window:
+                history.popleft()
+            if len(history) >= self.limit:
+                return False
+            history.append(now)
+            if len(self._history) > 10000:
+                # Forget partners whose window has expired
+                for key in [key for key, times in self._history.items() if times[-1] <= now - self.window]:
+                    del self._history[key]
+            return True
+
+
+# At most 5 submissions per partner per minute
+_submit_rate_limiter = SubmitRateLimiter(limit=5, window=60)
 
 
 class HelpdeskPortal(CustomerPortal):
     
+    _ticket_subject_max_length = 255
+    _ticket_description_max_length = 20000
+    
     def _prepare_home_portal_values(self, counters):
         values = super()._prepare_home_portal_values(counters)
         # Always compute the user's ticket count so the tile shows reliably
         try:
-            domain = [('partner_id', '=', request.env.user.partner_id.id)]
-            values['ticket_count'] = request.env['helpdesk.ticket'].sudo().search_count(domain)
+            values['ticket_count'] = request.env['helpdesk.ticket'].sudo()._portal_ticket_count(request.env.user.partner_id)
         except Exception:
             # Fallback to zero if any issue (e.g., during install)
             values['ticket_count'] = 0
         return values
     
     @http.route(['/my/tickets', '/my/tickets/page/<int:page>'], type='http', auth="user", website=True)
-    def portal_my_tickets(self, page=1, date_begin=None, date_end=None, sortby=None, **kw):
+    def portal_my_tickets(self, page=1, date_begin=None, date_end=None, sortby=None, after=None, before=None, **kw):
         # Check if user is Public user (not logged in)
         if request.env.user._is_public():
             return request.redirect('/web/login?redirect=/my/tickets')
         
         values = self._prepare_portal_layout_values()
         Ticket = request.env['helpdesk.ticket']
+        partner = request.env.user.partner_id
         
         # Only show tickets for the logged-in user's partner
-        domain = [('partner_id', '=', request.env.user.partner_id.id)]
+        domain = [('partner_id', '=', partner.id)]
         
         searchbar_sortings = {
-            'date': {'label': 'Newest', 'order': 'create_date desc'},
-            'name': {'label': 'Subject', 'order': 'name'},
-            'status': {'label': 'Status', 'order': 'status'},
+            'date': {'label': 'Newest'},
+            'name': {'label': 'Subject'},
+            'status': {'label': 'Status'},
         }
         
-        if not sortby:
+        if sortby not in searchbar_sortings:
             sortby = 'date'
-        order = searchbar_sortings[sortby]['order']
         
-        ticket_count = Ticket.search_count(domain)
-        pager = portal_pager(
-            url="/my/tickets",
-            url_args={'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby},
-            total=ticket_count,
-            page=page,
-            step=self._items_per_page
+        # Keyset pagination: pages are addressed by the id of the neighbouring ticket.
+        # The legacy /my/tickets/page/<n> URLs show the first page.
+        try:
+            after = int(after) if after else None
+            before = int(before) if before else None
+        except ValueError:
+            return request.redirect('/my/tickets')
+        tickets, next_cursor, prev_cursor = Ticket._portal_ticket_page(
+            domain, sortby, after=after, before=before, limit=self._items_per_page,
         )
+        if not tickets and (after or before):
+            return request.redirect(f'/my/tickets?sortby={sortby}')
         
-        tickets = Ticket.search(domain, order=order, limit=self._items_per_page, offset=pager['offset'])
+        url_args = {'date_begin': date_begin, 'date_end': date_end, 'sortby': sortby}
+        url_args = {key: value for key, value in url_args.items() if value}
         
         values.update({
             'date': date_begin,
             'tickets': tickets,
+            'ticket_count': Ticket.sudo()._portal_ticket_count(partner),
             'page_name': 'ticket',
             'default_url': '/my/tickets',
-            'pager': pager,
+            'next_url': next_cursor and '/my/tickets?%s' % urlencode(dict(url_args, after=next_cursor)),
+            'prev_url': prev_cursor and '/my/tickets?%s' % urlencode(dict(url_args, before=prev_cursor)),
             'searchbar_sortings': searchbar_sortings,
             'sortby': sortby,
         })
         return request.render("osool_helpdesk.portal_my_tickets", values)
     
+    def _render_ticket_form(self, errors=None, post=None, status=200):
+        """Render the portal ticket form; categories come from the cached catalog.
+        A re-rendered form keeps its submission token so a later retry stays idempotent.
+        """
+        post = post or {}
+        values = {
+            'categories': request.env['helpdesk.category']._get_portal_categories(),
+            'user': request.env.user,
+            'errors': errors or [],
+            'post': post,
+            'submission_token': post.get('submission_token') or uuid.uuid4().hex,
+        }
+        return request.render("osool_helpdesk.portal_create_ticket", values, status=status)
+    
+    @http.route(['/helpdesk/catalog'], type='http', auth="user", methods=['GET'], website=True)
+    def portal_category_catalog(self, **kw):
+        """Active categories and subcategories as JSON, revalidated by the browser with ETags"""
+        catalog = request.env['helpdesk.category']._get_catalog()
+        etag = '"%s"' % catalog['etag']
+        headers = [('ETag', etag), ('Cache-Control', 'private, no-cache')]
+        if etag in request.httprequest.headers.get('If-None-Match', ''):
+            return request.make_response('', headers=headers, status=304)
+        return request.make_response(catalog['portal_json'], headers=headers + [
+            ('Content-Type', 'application/json; charset=utf-8'),
+        ])
+    
     # Create ticket (GET)
     @http.route(['/helpdesk/ticket/create'], type='http', auth="user", website=True)
     def portal_ticket_create(self, **kw):
@@ -68,14 +148,7 @@ class HelpdeskPortal(CustomerPortal):
         if request.env.user._is_public():
             return request.redirect('/web/login?redirect=/helpdesk/ticket/create')
 
-        categories = request.env['helpdesk.category'].sudo().search([('active', '=', True)], order='sequence, name')
-        values = {
-            'categories': categories,
-            'user': request.env.user,
-            'errors': [],
-            'post': {},
-        }
-        return request.render("osool_helpdesk.portal_create_ticket", values)
+        return self._render_ticket_form()
 
     # Create ticket (POST)
     @http.route(['/helpdesk/ticket/submit'], type='http', auth="user", methods=['POST'], website=True, csrf=True)
@@ -84,65 +157,81 @@ class HelpdeskPortal(CustomerPortal):
         if request.env.user._is_public():
             return request.redirect('/web/login?redirect=/helpdesk/ticket/create')
 
-        subject = (post.get('subject') or '').strip()
-        description = (post.get('description') or '').strip()
-        category_id = post.get('category_id')
+        # Fast-path validation: reject bad requests before the ORM is touched
+        subject, description, cat_id, errors = self._validate_ticket_submission(post)
+        if errors:
+            return self._render_ticket_form(errors, post, status=400)
 
-        # Minimal validation
-        errors = []
-        if not subject:
-            errors.append('Subject is required')
-        if not description:
-            errors.append('Description is required')
+        partner = request.env.user.partner_id
+        token = post['submission_token']
+        Ticket = request.env['helpdesk.ticket'].sudo()
 
-        # Re-render with errors
-        if errors:
-            categories = request.env['helpdesk.category'].sudo().search([('active', '=', True)], order='sequence, name')
-            values = {
-                'categories': categories,
-                'user': request.env.user,
-                'errors': errors,
-                'post': post,
-            }
-            return request.render("osool_helpdesk.portal_create_ticket", values)
+        # Idempotency: a replayed submission (double-click, browser retry) leads to the ticket it created
+        ticket = Ticket._portal_submission_ticket(partner, token)
+        if ticket:
+            return request.redirect(f"/my/ticket/{ticket.id}")
+
+        if not _submit_rate_limiter.allow(partner.id):
+            return self._render_ticket_form([
+                'You are submitting tickets too quickly. Please wait a minute and try again.'
+            ], post, status=429)
 
         vals = {
             'name': subject,
             'description': description,
-            'partner_id': request.env.user.partner_id.id,
+            'partner_id': partner.id,
             'caller_source': 'selfservice',
+            'portal_submission_token': token,
         }
-
-        # Optional category
-        try:
-            if category_id:
-                cat_id = int(category_id)
-                vals['request_category_id'] = cat_id
-                # Persist the correct form_type based on the selected category
-                cat = request.env['helpdesk.category'].sudo().browse(cat_id)
-                if cat.exists() and cat.form_type:
-                    vals['form_type'] = cat.form_type
-        except Exception:
-            # ignore invalid category id
-            pass
+        if cat_id:
+            # form_type and department are set from the category by create()
+            vals['request_category_id'] = cat_id
 
         # Create the ticket with sudo to bypass portal create ACLs safely
         try:
-            ticket = request.env['helpdesk.ticket'].sudo().create(vals)
+            ticket = Ticket._create_portal_submission(vals)
+        except psycopg2.errors.SerializationFailure:
+            # Concurrent submission with the same token: let the request be retried
+            raise
         except Exception as e:
             # On error, show it to the user
-            categories = request.env['helpdesk.category'].sudo().search([('active', '=', True)], order='sequence, name')
-            values = {
-                'categories': categories,
-                'user': request.env.user,
-                'errors': [str(e)],
-                'post': post,
-            }
-            return request.render("osool_helpdesk.portal_create_ticket", values)
+            return self._render_ticket_form([str(e)], post)
 
         # Redirect to the ticket detail in portal
         return request.redirect(f"/my/ticket/{ticket.id}")
 
+    def _validate_ticket_submission(self, post):
+        """Check a portal submission using the request data and the cached catalog only.
+        Returns (subject, description, category_id, errors).
+        """
+        subject = (post.get('subject') or '').strip()
+        description = (post.get('description') or '').strip()
+        category_id = (post.get('category_id') or '').strip()
+
+        errors = []
+        if not subject:
+            errors.append('Subject is required')
+        elif len(subject) > self._ticket_subject_max_length:
+            errors.append('Subject must be at most %s characters' % self._ticket_subject_max_length)
+        if not description:
+            errors.append('Description is required')
+        elif len(description) > self._ticket_description_max_length:
+            errors.append('Description must be at most %s characters' % self._ticket_description_max_length)
+
+        cat_id = False
+        if category_id:
+            category = category_id.isdigit() and request.env['helpdesk.category']._get_catalog_category(int(category_id))
+            if category and category['active']:
+                cat_id = category['id']
+            else:
+                errors.append('Please select a valid category')
+
+        if not SUBMISSION_TOKEN_RE.match(post.get('submission_token') or ''):
+            # Stale form without a token: the re-rendered form carries a fresh one
+            post.pop('submission_token', None)
+            errors.append('Your form has expired. Please submit it again.')
+        return subject, description, cat_id, errors
+
     @http.route(['/helpdesk/help', '/my/helpdesk/help'], type='http', auth="public", website=True)
     def portal_help_page(self, **kw):
         """Public help page that explains how to submit and track tickets from the portal."""
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-migration script for the stored ticket_number and days_open columns
+Filling them in SQL keeps the upgrade from recomputing every ticket in Python
+"""
+
+
+def migrate(cr, version):
+    """Create and fill ticket_number and days_open on helpdesk_ticket"""
+    cr.execute("""
+        ALTER TABLE helpdesk_ticket
+            ADD COLUMN IF NOT EXISTS ticket_number VARCHAR,
+            ADD COLUMN IF NOT EXISTS days_open INTEGER
+    """)
+    
+    cr.execute("""
+        UPDATE helpdesk_ticket
+           SET ticket_number = CASE
+                   WHEN COALESCE(ticket_ref, '') != '' THEN '#' || ticket_ref
+                   ELSE COALESCE(name, '')
+               END,
+               days_open = CASE
+                   WHEN create_date IS NULL THEN 0
+                   WHEN status IN ('closed', 'cancelled') THEN
+                       COALESCE(EXTRACT(DAY FROM date_closed - create_date)::int, 0)
+                   ELSE EXTRACT(DAY FROM (NOW() AT TIME ZONE 'UTC') - create_date)::int
+               END
+    """)
+    print(f"Filled ticket_number and days_open for {cr.rowcount} tickets")
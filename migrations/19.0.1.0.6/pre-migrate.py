@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-migration script for the unique index on helpdesk_ticket.conversation_id
+Tickets sharing a conversation keep it on the oldest one; the others get a suffixed id
+"""
+
+
+def migrate(cr, version):
+    """Make conversation_id unique before the index is created"""
+    cr.execute("""
+        UPDATE helpdesk_ticket t
+           SET conversation_id = t.conversation_id || '#' || t.id
+          FROM (
+            SELECT conversation_id, MIN(id) AS keep_id
+              FROM helpdesk_ticket
+             WHERE conversation_id IS NOT NULL
+          GROUP BY conversation_id
+            HAVING COUNT(*) > 1
+          ) d
+         WHERE t.conversation_id = d.conversation_id
+           AND t.id != d.keep_id
+    """)
+    if cr.rowcount:
+        print(f"Renamed the conversation_id of {cr.rowcount} duplicate tickets")
@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 from . import helpdesk_ticket
+from . import helpdesk_ticket_stats
+from . import helpdesk_agent_load
 from . import helpdesk_category
 from . import helpdesk_subcategory
 from . import helpdesk_site
 from . import helpdesk_department
 from . import helpdesk_department_notified_email
 from . import helpdesk_sla
+from . import helpdesk_team
 from . import helpdesk_stage
 from . import helpdesk_audit
 from . import res_partner_tenant
 from . import res_users
+from . import mail_mail
 from . import website_page
 from . import res_config_settings
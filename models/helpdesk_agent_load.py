@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import heapq
+import logging
+from collections import defaultdict
+
+from odoo import models, fields, api
+
+from .helpdesk_ticket_stats import STATS_DIMENSIONS
+
+_logger = logging.getLogger(__name__)
+
+# Tickets in these statuses do not count against an agent's max_tickets
+# (same definition as res.users.assigned_ticket_count)
+LOAD_EXCLUDED_STATUSES = ('closed', 'cancelled')
+
+# Position of the user and the status in a helpdesk.ticket.stats key
+_USER_KEY = STATS_DIMENSIONS.index('user_id')
+_STATUS_KEY = len(STATS_DIMENSIONS) + 1
+
+
+class HelpdeskAgentLoad(models.Model):
+    """Open tickets per assigned user, for workload-aware auto-assignment.
+
+    Moved together with the statistics rollup: every delta applied by
+    ``helpdesk.ticket.stats._apply_deltas()`` also goes through
+    ``_apply_stats_deltas()``, and ``_rebuild()`` runs with the rollup rebuild.
+    ``_assign_agents()`` locks the counters of the candidate agents, so
+    concurrent creates cannot both fill the last slot of an agent.
+    """
+    _name = 'helpdesk.agent.load'
+    _description = 'Helpdesk Agent Load'
+    _auto = False
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='Agent', readonly=True)
+    open_count = fields.Integer(string='Open Tickets', readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("SELECT to_regclass(%s)", (self._table,))
+        if cr.fetchone()[0]:
+            return
+        cr.execute(f"""
+            CREATE TABLE "{self._table}" (
+                id SERIAL PRIMARY KEY,
+                user_id INTEGER NOT NULL UNIQUE,
+                open_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Recount the open tickets of every user from helpdesk_ticket, touching only the
+        counters that differ.
+
+        They are locked in user order, like in ``_assign_agents()``, and the table is
+        never truncated: a counter moved by a transaction committed after this one's
+        snapshot makes it fail with a serialization error instead of being overwritten.
+        """
+        self.env['helpdesk.ticket'].flush_model(['user_id', 'status', 'active'])
+        cr = self.env.cr
+        cr.execute("DROP TABLE IF EXISTS helpdesk_agent_load_truth")
+        cr.execute("""
+            CREATE TEMPORARY TABLE helpdesk_agent_load_truth ON COMMIT DROP AS
+            SELECT user_id, COUNT(*)::int AS open_count
+              FROM helpdesk_ticket
+             WHERE active AND user_id IS NOT NULL AND status NOT IN %s
+          GROUP BY user_id
+        """, (LOAD_EXCLUDED_STATUSES,))
+        cr.execute(f"""
+            SELECT l.id
+              FROM "{self._table}" l
+         LEFT JOIN helpdesk_agent_load_truth v ON v.user_id = l.user_id
+             WHERE COALESCE(v.open_count, 0) <> l.open_count
+          ORDER BY l.user_id
+               FOR UPDATE OF l
+        """)
+        # Counters of users without open tickets stay at 0: _assign_agents() locks them
+        cr.execute(f"""
+            UPDATE "{self._table}" l SET open_count = 0
+             WHERE l.open_count <> 0
+               AND NOT EXISTS (SELECT 1 FROM helpdesk_agent_load_truth v WHERE v.user_id = l.user_id)
+        """)
+        reset = cr.rowcount
+        cr.execute(f"""
+            INSERT INTO "{self._table}" (user_id, open_count)
+            SELECT user_id, open_count FROM helpdesk_agent_load_truth ORDER BY user_id
+            ON CONFLICT (user_id)
+            DO UPDATE SET open_count = EXCLUDED.open_count
+                    WHERE "{self._table}".open_count <> EXCLUDED.open_count
+        """)
+        _logger.info("Rebuilt %s: %s rows upserted, %s reset", self._table, cr.rowcount, reset)
+        cr.execute("DROP TABLE helpdesk_agent_load_truth")
+        self.invalidate_model()
+
+    @api.model
+    def _apply_stats_deltas(self, deltas):
+        """Move the counters by the open tickets of ``deltas``, {rollup key: ticket count delta}"""
+        user_deltas = defaultdict(int)
+        for key, delta in deltas.items():
+            if key[_USER_KEY] and key[_STATUS_KEY] not in LOAD_EXCLUDED_STATUSES:
+                user_deltas[key[_USER_KEY]] += delta
+        user_deltas = {user_id: delta for user_id, delta in user_deltas.items() if delta}
+        if not user_deltas:
+            return
+        # Upsert in user order, the order _assign_agents() locks the counters in
+        user_ids = sorted(user_deltas)
+        self.env.cr.execute(f"""
+            INSERT INTO "{self._table}" (user_id, open_count)
+            SELECT user_id, open_count FROM unnest(%s::int[], %s::int[]) AS v(user_id, open_count)
+          ORDER BY user_id
+            ON CONFLICT (user_id)
+            DO UPDATE SET open_count = "{self._table}".open_count + EXCLUDED.open_count
+        """, (user_ids, [user_deltas[user_id] for user_id in user_ids]))
+        self.invalidate_model()
+
+    @api.model
+    def _assign_agents(self, team_ids):
+        """Pick the least-loaded agent under max_tickets for each team of ``team_ids``.
+
+        Returns a list of user ids aligned with ``team_ids``, False where the team
+        has no agent with room left. Agents picked earlier in the batch count
+        as loaded. The counters of the candidates stay locked until the end of
+        the transaction; they are incremented when the tickets get their user.
+        """
+        teams = {team_id for team_id in team_ids if team_id}
+        if not teams:
+            return [False] * len(team_ids)
+        agents = self.env['res.users'].sudo().search_fetch([
+            ('is_helpdesk_agent', '=', True),
+            ('helpdesk_team_ids', 'in', list(teams)),
+        ], ['helpdesk_team_ids', 'max_tickets'], order='id')
+        if not agents:
+            return [False] * len(team_ids)
+
+        # Lock in user order so that concurrent batches cannot deadlock
+        cr = self.env.cr
+        cr.execute(f"""
+            INSERT INTO "{self._table}" (user_id)
+            SELECT unnest(%s::int[])
+            ON CONFLICT (user_id) DO NOTHING
+        """, (agents.ids,))
+        cr.execute(f"""
+            SELECT user_id, open_count FROM "{self._table}"
+             WHERE user_id IN %s
+          ORDER BY user_id
+               FOR UPDATE
+        """, (tuple(agents.ids),))
+        load = dict(cr.fetchall())
+        capacity = {agent.id: agent.max_tickets for agent in agents}
+
+        # One heap of (load, user id) per team; entries go stale when the agent
+        # is picked for another team and are refreshed when they reach the top
+        heaps = defaultdict(list)
+        for agent in agents:
+            if load[agent.id] < capacity[agent.id]:
+                for team_id in agent.helpdesk_team_ids.ids:
+                    if team_id in teams:
+                        heaps[team_id].append((load[agent.id], agent.id))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        result = []
+        for team_id in team_ids:
+            heap = heaps.get(team_id)
+            user_id = False
+            while heap and not user_id:
+                count, candidate = heap[0]
+                if count == load[candidate]:
+                    user_id = candidate
+                    load[candidate] += 1
+                if load[candidate] < capacity[candidate]:
+                    heapq.heapreplace(heap, (load[candidate], candidate))
+                else:
+                    heapq.heappop(heap)
+            result.append(user_id)
+        return result
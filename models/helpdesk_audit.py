@@ -1,12 +1,42 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
 
 
 class HelpdeskAudit(models.Model):
+    """Append-only audit log.
+
+    The table is managed by hand (``_auto = False``): it is range-partitioned by
+    month on ``timestamp`` and indexed on ``(ticket_id, timestamp)``. Records are
+    inserted with a single multi-row INSERT and can never be modified; reads go
+    through the regular ORM so views and the ticket Audit Trail tab are unchanged.
+
+    Ticket actions do not write audit rows directly: they call ``_buffer()``,
+    which collects rows for the current transaction and writes them in bulk
+    right before commit. By default that single INSERT still runs in the
+    request's transaction: every action of the request shares it, and a
+    rolled-back request leaves no audit rows. In deferred mode
+    (``helpdesk.audit_deferred``) the rows go to the lightweight
+    ``helpdesk_audit_queue`` staging table instead, and a cron job, only active
+    in that mode, drains it into the audit log.
+    """
     _name = 'helpdesk.audit'
     _description = 'Helpdesk Ticket Audit Log'
     _order = 'timestamp desc'
-    
+    _auto = False
+    _log_access = False
+
+    # Number of monthly partitions kept ready ahead of the current month
+    _partition_months_ahead = 2
+    # Rows moved from the staging queue per cron batch
+    _queue_batch_size = 5000
+
     ticket_id = fields.Many2one('helpdesk.ticket', string='Ticket', required=True, ondelete='cascade')
     user_id = fields.Many2one('res.users', string='User', required=True)
     action = fields.Char(string='Action', required=True)
@@ -14,3 +44,216 @@ class HelpdeskAudit(models.Model):
     old_value = fields.Text(string='Old Value')
     new_value = fields.Text(string='New Value')
     timestamp = fields.Datetime(string='Timestamp', required=True, default=fields.Datetime.now)
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("SELECT relkind FROM pg_class WHERE relname = %s", (self._table,))
+        row = cr.fetchone()
+        legacy = row and row[0] == 'r'
+        if legacy:
+            cr.execute(f'ALTER TABLE "{self._table}" RENAME TO "{self._table}_legacy"')
+            cr.execute(f'ALTER SEQUENCE IF EXISTS "{self._table}_id_seq" RENAME TO "{self._table}_legacy_id_seq"')
+            cr.execute(f'ALTER INDEX IF EXISTS "{self._table}_pkey" RENAME TO "{self._table}_legacy_pkey"')
+        if not row or legacy:
+            cr.execute(f"""
+                CREATE TABLE "{self._table}" (
+                    id SERIAL NOT NULL,
+                    ticket_id INTEGER NOT NULL REFERENCES helpdesk_ticket(id) ON DELETE CASCADE,
+                    user_id INTEGER NOT NULL REFERENCES res_users(id) ON DELETE RESTRICT,
+                    action VARCHAR NOT NULL,
+                    description TEXT,
+                    old_value TEXT,
+                    new_value TEXT,
+                    timestamp TIMESTAMP NOT NULL,
+                    PRIMARY KEY (id, timestamp)
+                ) PARTITION BY RANGE (timestamp)
+            """)
+            cr.execute(f'CREATE TABLE "{self._table}_default" PARTITION OF "{self._table}" DEFAULT')
+            cr.execute(f"""
+                CREATE INDEX "{self._table}_ticket_id_timestamp_index"
+                    ON "{self._table}" (ticket_id, timestamp DESC)
+            """)
+        if legacy:
+            self._migrate_legacy_table()
+        self._create_partitions()
+        # Staging table for deferred mode: no constraints nor indexes besides the PK
+        cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{self._table}_queue" (
+                id BIGSERIAL PRIMARY KEY,
+                ticket_id INTEGER,
+                user_id INTEGER,
+                action VARCHAR,
+                description TEXT,
+                old_value TEXT,
+                new_value TEXT,
+                timestamp TIMESTAMP
+            )
+        """)
+
+    def _migrate_legacy_table(self):
+        """Move rows of the former ordinary table into the partitioned table"""
+        cr = self.env.cr
+        legacy_table = f'{self._table}_legacy'
+        cr.execute(f'SELECT MIN(timestamp), MAX(timestamp) FROM "{legacy_table}"')
+        first, last = cr.fetchone()
+        if first:
+            month = first.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            while month <= last:
+                self._create_partition(month)
+                month += relativedelta(months=1)
+        cr.execute(f"""
+            INSERT INTO "{self._table}" (id, ticket_id, user_id, action, description, old_value, new_value, timestamp)
+            SELECT id, ticket_id, user_id, action, description, old_value, new_value, timestamp
+              FROM "{legacy_table}"
+        """)
+        _logger.info("Moved %s audit rows to partitioned table %s", cr.rowcount, self._table)
+        cr.execute(f"""
+            SELECT setval('"{self._table}_id_seq"', GREATEST(
+                (SELECT COALESCE(MAX(id), 0) FROM "{self._table}"), 1))
+        """)
+        cr.execute(f'DROP TABLE "{legacy_table}"')
+
+    def _create_partition(self, month):
+        """Create the partition holding the given month unless it already exists.
+        Rows that landed in the default partition for that month are moved into it.
+        """
+        cr = self.env.cr
+        start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = start + relativedelta(months=1)
+        partition = f'{self._table}_y{start.year}m{start.month:02d}'
+        cr.execute("SELECT to_regclass(%s)", (partition,))
+        if cr.fetchone()[0]:
+            return False
+        cr.execute(f'CREATE TABLE "{partition}" (LIKE "{self._table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cr.execute(f"""
+            WITH moved AS (
+                DELETE FROM "{self._table}_default"
+                 WHERE timestamp >= %s AND timestamp < %s
+             RETURNING *
+            )
+            INSERT INTO "{partition}" SELECT * FROM moved
+        """, (start, end))
+        cr.execute(f"""
+            ALTER TABLE "{self._table}" ATTACH PARTITION "{partition}"
+                FOR VALUES FROM (%s) TO (%s)
+        """, (start, end))
+        return True
+
+    @api.model
+    def _create_partitions(self):
+        """Make sure partitions exist for the current month and the next ones"""
+        month = fields.Datetime.now()
+        for offset in range(self._partition_months_ahead + 1):
+            self._create_partition(month + relativedelta(months=offset))
+
+    @api.model
+    def _column_values(self, vals_list):
+        """Turn a list of audit values into the column arrays used by bulk INSERTs"""
+        now = fields.Datetime.now()
+        columns = {
+            'ticket_id': [],
+            'user_id': [],
+            'action': [],
+            'description': [],
+            'old_value': [],
+            'new_value': [],
+            'timestamp': [],
+        }
+        for vals in vals_list:
+            if not vals.get('ticket_id') or not vals.get('action'):
+                raise UserError(_('Audit entries require a ticket and an action.'))
+            columns['ticket_id'].append(vals['ticket_id'])
+            columns['user_id'].append(vals.get('user_id') or self.env.uid)
+            columns['action'].append(vals['action'])
+            columns['description'].append(vals.get('description') or None)
+            columns['old_value'].append(vals.get('old_value') or None)
+            columns['new_value'].append(vals.get('new_value') or None)
+            columns['timestamp'].append(vals.get('timestamp') or now)
+        return tuple(columns.values())
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Append rows with a single INSERT, bypassing the generic ORM create"""
+        self.check_access('create')
+        if not vals_list:
+            return self.browse()
+        self.env.cr.execute(f"""
+            INSERT INTO "{self._table}" (ticket_id, user_id, action, description, old_value, new_value, timestamp)
+            SELECT * FROM unnest(%s::int[], %s::int[], %s::varchar[], %s::text[], %s::text[], %s::text[], %s::timestamp[])
+            RETURNING id
+        """, self._column_values(vals_list))
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def write(self, vals):
+        raise UserError(_('Audit trail entries cannot be modified.'))
+
+    def unlink(self):
+        raise UserError(_('Audit trail entries cannot be deleted.'))
+
+    @api.model
+    def _buffer(self, vals_list):
+        """Collect audit rows for the current transaction; they are written in bulk before commit"""
+        if not vals_list:
+            return
+        precommit = self.env.cr.precommit
+        buffer = precommit.data.get('helpdesk.audit.buffer')
+        if buffer is None:
+            buffer = precommit.data['helpdesk.audit.buffer'] = []
+            precommit.add(self.sudo()._flush_buffer)
+        buffer.extend(vals_list)
+
+    @api.model
+    def _flush_buffer(self):
+        """Write the rows collected by _buffer(), directly or through the staging queue"""
+        vals_list = self.env.cr.precommit.data.pop('helpdesk.audit.buffer', [])
+        if not vals_list:
+            return
+        # Skip rows of tickets deleted later in the same transaction
+        ticket_ids = set(self.env['helpdesk.ticket'].browse({vals['ticket_id'] for vals in vals_list}).exists().ids)
+        vals_list = [vals for vals in vals_list if vals['ticket_id'] in ticket_ids]
+        if not vals_list:
+            return
+        deferred = self.env['ir.config_parameter'].sudo().get_param('helpdesk.audit_deferred')
+        if not deferred:
+            self.create(vals_list)
+            return
+        self.env.cr.execute(f"""
+            INSERT INTO "{self._table}_queue" (ticket_id, user_id, action, description, old_value, new_value, timestamp)
+            SELECT * FROM unnest(%s::int[], %s::int[], %s::varchar[], %s::text[], %s::text[], %s::text[], %s::timestamp[])
+        """, self._column_values(vals_list))
+
+    @api.model
+    def _cron_drain_queue(self):
+        """Move staged audit rows into the audit log, one batch per transaction"""
+        cr = self.env.cr
+        while True:
+            # Rows of tickets deleted in the meantime are dropped by the join
+            cr.execute(f"""
+                WITH batch AS (
+                    DELETE FROM "{self._table}_queue"
+                     WHERE id IN (
+                        SELECT id FROM "{self._table}_queue"
+                         ORDER BY id
+                         LIMIT %s
+                           FOR UPDATE SKIP LOCKED
+                     )
+                 RETURNING *
+                ), inserted AS (
+                    INSERT INTO "{self._table}" (ticket_id, user_id, action, description, old_value, new_value, timestamp)
+                    SELECT b.ticket_id, b.user_id, b.action, b.description, b.old_value, b.new_value, b.timestamp
+                      FROM batch b
+                      JOIN helpdesk_ticket t ON t.id = b.ticket_id
+                     ORDER BY b.id
+                )
+                SELECT COUNT(*) FROM batch
+            """, (self._queue_batch_size,))
+            drained = cr.fetchone()[0]
+            if not drained:
+                break
+            _logger.info("Drained %s staged audit rows", drained)
+            cr.commit()
+        # Out of deferred mode, the queue stays empty once drained: stop polling it
+        if not self.env['ir.config_parameter'].sudo().get_param('helpdesk.audit_deferred'):
+            cron = self.env.ref('osool_helpdesk.ir_cron_helpdesk_audit_queue', raise_if_not_found=False)
+            if cron:
+                cron.sudo().active = False
@@ -1,5 +1,14 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+import hashlib
+import json
+from collections import namedtuple
+
+from odoo import models, fields, api, tools
+
+# Defaults a (category, subcategory) pair gives its tickets, None where it gives none
+RoutingDefaults = namedtuple('RoutingDefaults', [
+    'form_type', 'team_department_id', 'team_id', 'ticket_owner_id', 'user_id', 'sla_id', 'priority',
+])
 
 
 class HelpdeskCategory(models.Model):
@@ -42,7 +51,150 @@ class HelpdeskCategory(models.Model):
     ticket_count = fields.Integer(string='Ticket Count', compute='_compute_ticket_count')
     
     def _compute_ticket_count(self):
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('request_category_id', self)
         for category in self:
-            category.ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('request_category_id', '=', category.id)
-            ])
+            category.ticket_count = counts.get(category.id, 0)
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        categories = super(HelpdeskCategory, self).create(vals_list)
+        self.env.registry.clear_cache()
+        return categories
+    
+    def write(self, vals):
+        result = super(HelpdeskCategory, self).write(vals)
+        self.env.registry.clear_cache()
+        return result
+    
+    def unlink(self):
+        result = super(HelpdeskCategory, self).unlink()
+        self.env.registry.clear_cache()
+        return result
+    
+    @api.model
+    @tools.ormcache('self.env.lang')
+    def _get_catalog(self):
+        """Category/subcategory catalog, cached per language in every worker.
+        Any change to a category or subcategory clears the registry cache, which
+        other workers pick up through the registry signaling.
+
+        Returns a dict with:
+        - ``categories``: {category_id: category values}, all categories (archived
+          included) in display order, each with its ``subcategories`` list
+        - ``portal_json``: active categories and subcategories serialized for the portal
+        - ``etag``: digest of ``portal_json``
+
+        The result is shared: callers must not modify it.
+        """
+        categories = self.sudo().with_context(active_test=False).search([])
+        subcategories = self.env['helpdesk.subcategory'].sudo().with_context(active_test=False).search([
+            ('category_id', 'in', categories.ids),
+        ])
+        catalog = {
+            category.id: {
+                'id': category.id,
+                'name': category.name,
+                'code': category.code,
+                'active': category.active,
+                'form_type': category.form_type or False,
+                'team_id': category.team_id.id,
+                'team_department_id': category.team_department_id.id,
+                'ticket_owner_id': category.ticket_owner_id.id,
+                'subcategories': [],
+            }
+            for category in categories
+        }
+        for subcategory in subcategories:
+            catalog[subcategory.category_id.id]['subcategories'].append({
+                'id': subcategory.id,
+                'name': subcategory.name,
+                'code': subcategory.code,
+                'active': subcategory.active,
+            })
+        portal_json = json.dumps([
+            {
+                'id': category['id'],
+                'name': category['name'],
+                'form_type': category['form_type'],
+                'subcategories': [
+                    {'id': subcategory['id'], 'name': subcategory['name']}
+                    for subcategory in category['subcategories'] if subcategory['active']
+                ],
+            }
+            for category in catalog.values() if category['active']
+        ])
+        return {
+            'categories': catalog,
+            'portal_json': portal_json,
+            'etag': hashlib.sha1(portal_json.encode()).hexdigest(),
+        }
+    
+    @api.model
+    def _get_catalog_category(self, category_id):
+        """Cached values of one category, or None if it does not exist"""
+        return self._get_catalog()['categories'].get(category_id)
+    
+    @api.model
+    @tools.ormcache()
+    def _get_routing_table(self):
+        """Routing defaults compiled for every category, keyed (category_id, False), and
+        the subcategory's own defaults for every (category_id, subcategory_id) pair.
+        Cached in every worker and cleared with the catalog, and when an SLA's
+        priority changes.
+        """
+        categories = self.sudo().with_context(active_test=False).search_fetch(
+            [], ['form_type', 'team_id', 'team_department_id', 'ticket_owner_id'],
+        )
+        subcategories = self.env['helpdesk.subcategory'].sudo().with_context(active_test=False).search_fetch(
+            [('category_id', 'in', categories.ids)],
+            ['category_id', 'team_id', 'ticket_owner_id', 'auto_assign_user_id', 'sla_id'],
+        )
+        subcategories.sla_id.fetch(['ticket_priority'])
+        table = {}
+        for category in categories:
+            table[category.id, False] = RoutingDefaults(
+                form_type=category.form_type or None,
+                team_department_id=category.team_department_id.id or None,
+                team_id=category.team_id.id or None,
+                ticket_owner_id=category.ticket_owner_id.id or None,
+                user_id=None,
+                sla_id=None,
+                priority=None,
+            )
+        for subcategory in subcategories:
+            sla = subcategory.sla_id
+            table[subcategory.category_id.id, subcategory.id] = RoutingDefaults(
+                form_type=None,
+                team_department_id=None,
+                team_id=subcategory.team_id.id or None,
+                ticket_owner_id=subcategory.ticket_owner_id.id or None,
+                user_id=subcategory.auto_assign_user_id.id or None,
+                sla_id=sla.id or None,
+                # Without an SLA policy the ticket gets the lowest priority
+                priority=(sla.ticket_priority or None) if sla else '0',
+            )
+        return table
+    
+    @api.model
+    def _get_routing_vals(self, category_id, subcategory_id=False, inherit=True):
+        """Field values a ticket of this category and subcategory gets by default, from
+        the compiled routing table: the subcategory's defaults over the category's, or
+        the subcategory's alone without ``inherit``. A subcategory of another category
+        is ignored."""
+        table = self._get_routing_table()
+        if (category_id, False) not in table:
+            return {}
+        layers = [table[category_id, False]] if inherit else []
+        if subcategory_id and (category_id, subcategory_id) in table:
+            layers.append(table[category_id, subcategory_id])
+        return {
+            field: value
+            for defaults in layers
+            for field, value in defaults._asdict().items()
+            if value is not None
+        }
+    
+    @api.model
+    def _get_portal_categories(self):
+        """Active categories offered on the portal ticket form"""
+        return [category for category in self._get_catalog()['categories'].values() if category['active']]
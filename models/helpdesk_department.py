@@ -41,26 +41,10 @@ class HelpdeskTeamDepartment(models.Model):
         return new_dept
     
     def _compute_ticket_count(self):
-        """Compute total tickets for all teams under this department"""
+        """Compute total, open and closed tickets (folded stages are closed) in one grouped query"""
+        counts = self.env['helpdesk.ticket']._stage_fold_ticket_counts('team_department_id', self)
         for dept in self:
-            tickets = self.env['helpdesk.ticket'].search([
-                ('team_department_id', '=', dept.id)
-            ])
-            dept.ticket_count = len(tickets)
-            
-            # Count open tickets (not closed or canceled)
-            open_tickets = self.env['helpdesk.ticket'].search([
-                ('team_department_id', '=', dept.id),
-                ('stage_id.fold', '=', False)
-            ])
-            dept.open_ticket_count = len(open_tickets)
-            
-            # Count closed tickets (folded stages are considered closed)
-            closed_tickets = self.env['helpdesk.ticket'].search([
-                ('team_department_id', '=', dept.id),
-                ('stage_id.fold', '=', True)
-            ])
-            dept.closed_ticket_count = len(closed_tickets)
+            dept.ticket_count, dept.open_ticket_count, dept.closed_ticket_count = counts.get(dept.id, (0, 0, 0))
     
     def action_view_tickets(self):
         """Open tickets for this department"""
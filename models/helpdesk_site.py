@@ -31,8 +31,11 @@ class HelpdeskSite(models.Model):
     @api.depends('name')
     def _compute_department_count(self):
         """Count departments associated with this site via Many2many"""
+        counts = dict(self.env['helpdesk.team.department']._read_group(
+            [('site_ids', 'in', self.ids)], ['site_ids'], ['__count']
+        )) if self.ids else {}
         for site in self:
-            site.department_count = self.env['helpdesk.team.department'].search_count([('site_ids', 'in', site.id)])
+            site.department_count = counts.get(site, 0)
     
     def copy(self, default=None):
         """Override copy to duplicate notification emails"""
@@ -46,26 +49,10 @@ class HelpdeskSite(models.Model):
         return new_site
     
     def _compute_ticket_count(self):
-        """Compute total tickets for all departments under this site"""
+        """Compute total, open and closed tickets (folded stages are closed) in one grouped query"""
+        counts = self.env['helpdesk.ticket']._stage_fold_ticket_counts('site_id', self)
         for site in self:
-            tickets = self.env['helpdesk.ticket'].search([
-                ('site_id', '=', site.id)
-            ])
-            site.ticket_count = len(tickets)
-            
-            # Count open tickets (not closed or canceled)
-            open_tickets = self.env['helpdesk.ticket'].search([
-                ('site_id', '=', site.id),
-                ('stage_id.fold', '=', False)
-            ])
-            site.open_ticket_count = len(open_tickets)
-            
-            # Count closed tickets (folded stages are considered closed)
-            closed_tickets = self.env['helpdesk.ticket'].search([
-                ('site_id', '=', site.id),
-                ('stage_id.fold', '=', True)
-            ])
-            site.closed_ticket_count = len(closed_tickets)
+            site.ticket_count, site.open_ticket_count, site.closed_ticket_count = counts.get(site.id, (0, 0, 0))
     
     def action_view_tickets(self):
         """Open tickets for this site"""
@@ -30,3 +30,17 @@ class HelpdeskSLA(models.Model):
     # Escalation
     auto_escalate = fields.Boolean(string='Auto Escalate on Breach', default=True)
     escalation_user_id = fields.Many2one('res.users', string='Escalate To')
+    
+    # Changes to these fields alter the compiled ticket routing table
+    _routing_fields = {'ticket_priority'}
+    
+    def write(self, vals):
+        result = super(HelpdeskSLA, self).write(vals)
+        if self._routing_fields.intersection(vals):
+            self.env.registry.clear_cache()
+        return result
+    
+    def unlink(self):
+        result = super(HelpdeskSLA, self).unlink()
+        self.env.registry.clear_cache()
+        return result
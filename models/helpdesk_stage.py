@@ -14,3 +14,12 @@ class HelpdeskStage(models.Model):
     is_in_progress = fields.Boolean(string='Is In Progress Stage', default=False)
     requires_approval = fields.Boolean(string='Requires Approval', default=False)
     approval_user_ids = fields.Many2many('res.users', string='Approvers')
+    
+    def write(self, vals):
+        if 'fold' in vals:
+            flipped = self.filtered(lambda stage: stage.fold != bool(vals['fold']))
+        result = super(HelpdeskStage, self).write(vals)
+        # Folding a stage moves all its tickets between open and closed counters
+        if 'fold' in vals:
+            self.env['helpdesk.ticket.stats']._move_stage_fold(flipped.ids, bool(vals['fold']))
+        return result
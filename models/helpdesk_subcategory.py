@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
+
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError
 
@@ -40,11 +42,18 @@ class HelpdeskSubcategory(models.Model):
     # Statistics
     ticket_count = fields.Integer(string='Ticket Count', compute='_compute_ticket_count')
     
+    # Open tickets still to be moved to a new team/SLA by the cascade job (see _cron_cascade_tickets)
+    cascade_team_pending = fields.Boolean(string='Team Update Pending', readonly=True, copy=False)
+    cascade_sla_pending = fields.Boolean(string='SLA Update Pending', readonly=True, copy=False)
+    cascade_done_count = fields.Integer(string='Tickets Updated', readonly=True, copy=False)
+    
+    # Tickets updated per chunk by the cascade job
+    _cascade_chunk_size = 500
+    
     def _compute_ticket_count(self):
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('request_subcategory_id', self)
         for subcategory in self:
-            subcategory.ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('request_subcategory_id', '=', subcategory.id)
-            ])
+            subcategory.ticket_count = counts.get(subcategory.id, 0)
     
     def action_view_tickets(self):
         """View tickets for this subcategory"""
@@ -100,6 +109,7 @@ class HelpdeskSubcategory(models.Model):
                 vals['code'] = vals['code'].upper()
         
         subcategories = super(HelpdeskSubcategory, self).create(vals_list)
+        self.env.registry.clear_cache()
         
         # Post creation actions
         for subcategory in subcategories:
@@ -151,10 +161,8 @@ class HelpdeskSubcategory(models.Model):
                         ('stage_id.is_closed', '=', False)
                     ])
                     if open_tickets:
-                        open_tickets.message_post(
-                            body=_("Warning: Subcategory '%s' has been archived but this ticket is still open.") % record.name,
-                            subtype_xmlid='mail.mt_note'
-                        )
+                        body = _("Warning: Subcategory '%s' has been archived but this ticket is still open.") % record.name
+                        open_tickets._message_log_batch(bodies=dict.fromkeys(open_tickets.ids, body))
             
             # Ensure code is uppercase
             if 'code' in vals and vals['code']:
@@ -167,32 +175,117 @@ class HelpdeskSubcategory(models.Model):
                     subtype_xmlid='mail.mt_note'
                 )
         
+        # Open tickets follow a new team or SLA: flag the subcategory for the cascade job
+        cascade = {}
+        if vals.get('team_id'):
+            cascade['cascade_team_pending'] = True
+        if vals.get('sla_id'):
+            cascade['cascade_sla_pending'] = True
+        if cascade:
+            vals = dict(vals, cascade_done_count=0, **cascade)
+        
         # Call parent write
         result = super(HelpdeskSubcategory, self).write(vals)
+        self.env.registry.clear_cache()
         
-        # Update related tickets if team or SLA changed
-        if 'team_id' in vals or 'sla_id' in vals:
-            for record in self:
-                tickets = self.env['helpdesk.ticket'].search([
-                    ('request_subcategory_id', '=', record.id),
-                    ('stage_id.is_closed', '=', False)
-                ])
-                
-                ticket_vals = {}
-                if 'team_id' in vals and vals['team_id']:
-                    ticket_vals['team_id'] = vals['team_id']
-                if 'sla_id' in vals and vals['sla_id']:
-                    ticket_vals['sla_id'] = vals['sla_id']
-                
-                if ticket_vals and tickets:
-                    tickets.write(ticket_vals)
-                    record.message_post(
-                        body=_("Updated %d open ticket(s) with new settings") % len(tickets),
-                        subtype_xmlid='mail.mt_note'
-                    )
+        if cascade:
+            # Not loaded yet while the module's own data is installed
+            cron = self.env.ref('osool_helpdesk.ir_cron_helpdesk_subcategory_ticket_cascade', raise_if_not_found=False)
+            if cron:
+                cron._trigger()
         
         return result
     
+    @api.model
+    def _cron_cascade_tickets(self):
+        """Move the open tickets of flagged subcategories to the subcategory's team and SLA.
+        
+        Tickets are picked by one query over all flagged subcategories, a chunk at a
+        time; each chunk is one write per subcategory and resulting team (bulk audit
+        rows, and the SLA deadlines restarted on that team's calendar in the same
+        write) and one batched chatter log, then committed with its progress. A
+        subcategory is unflagged once none of its open tickets differ.
+        """
+        Ticket = self.env['helpdesk.ticket'].sudo()
+        Ticket.flush_model(['request_subcategory_id', 'team_id', 'sla_id', 'stage_id'])
+        self.flush_model(['team_id', 'sla_id', 'cascade_team_pending', 'cascade_sla_pending'])
+        # Open tickets of subcategory s that do not have its new team/SLA yet
+        outdated = """
+            st.is_closed IS NOT TRUE
+            AND ((s.cascade_team_pending AND s.team_id IS NOT NULL AND t.team_id IS DISTINCT FROM s.team_id)
+              OR (s.cascade_sla_pending AND s.sla_id IS NOT NULL AND t.sla_id IS DISTINCT FROM s.sla_id))
+        """
+        query = f"""
+            FROM helpdesk_ticket t
+            JOIN helpdesk_subcategory s ON s.id = t.request_subcategory_id
+       LEFT JOIN helpdesk_stage st ON st.id = t.stage_id
+           WHERE {outdated}
+        """
+        self.env.cr.execute(f"SELECT COUNT(*) {query}")
+        remaining = self.env.cr.fetchone()[0]
+        while remaining:
+            # Tickets keep their team unless it cascades: grouped by the team they end up
+            # with, every write has one calendar and takes the SLA deadlines along
+            self.env.cr.execute(f"""
+                SELECT t.id, t.request_subcategory_id,
+                       CASE WHEN s.cascade_team_pending AND s.team_id IS NOT NULL THEN s.team_id ELSE t.team_id END
+                {query} ORDER BY t.id LIMIT %s
+            """, (self._cascade_chunk_size,))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            ticket_ids = defaultdict(list)
+            group_ids = defaultdict(list)
+            for ticket_id, subcategory_id, team_id in rows:
+                ticket_ids[subcategory_id].append(ticket_id)
+                group_ids[subcategory_id, team_id].append(ticket_id)
+            subcategories = {subcategory.id: subcategory for subcategory in self.sudo().browse(ticket_ids)}
+            bodies = {}
+            for (subcategory_id, team_id), group in group_ids.items():
+                subcategory = subcategories[subcategory_id]
+                ticket_vals = {}
+                if subcategory.cascade_team_pending and subcategory.team_id:
+                    ticket_vals['team_id'] = subcategory.team_id.id
+                if subcategory.cascade_sla_pending and subcategory.sla_id:
+                    ticket_vals['sla_id'] = subcategory.sla_id.id
+                # The batched log below replaces per-ticket tracking messages
+                Ticket.browse(group).with_context(mail_notrack=True).write(ticket_vals)
+                body = _("Team/SLA updated from subcategory '%s'") % subcategory.name
+                bodies.update(dict.fromkeys(group, body))
+            Ticket.browse(list(bodies))._message_log_batch(bodies=bodies)
+            self.env.flush_all()
+            self.env.cr.execute("""
+                UPDATE helpdesk_subcategory s
+                   SET cascade_done_count = s.cascade_done_count + v.done
+                  FROM unnest(%s::int[], %s::int[]) AS v(id, done)
+                 WHERE s.id = v.id
+            """, (list(ticket_ids), [len(ids) for ids in ticket_ids.values()]))
+            remaining = max(remaining - len(rows), 0)
+            if not self.env['ir.cron']._commit_progress(len(rows), remaining=remaining):
+                # Out of time: the cron runs again for the rest
+                return
+            self.env.invalidate_all()
+        
+        # Unflag the subcategories done, except those changed again meanwhile, and report on them
+        self.env.cr.execute(f"""
+            UPDATE helpdesk_subcategory s
+               SET cascade_team_pending = FALSE, cascade_sla_pending = FALSE
+             WHERE (s.cascade_team_pending OR s.cascade_sla_pending)
+               AND NOT EXISTS (
+                    SELECT 1 FROM helpdesk_ticket t
+                 LEFT JOIN helpdesk_stage st ON st.id = t.stage_id
+                     WHERE t.request_subcategory_id = s.id AND {outdated}
+               )
+         RETURNING s.id
+        """)
+        finished = self.sudo().browse([row[0] for row in self.env.cr.fetchall()])
+        finished.invalidate_recordset(['cascade_team_pending', 'cascade_sla_pending', 'cascade_done_count'])
+        for subcategory in finished.filtered('cascade_done_count'):
+            subcategory.message_post(
+                body=_("Updated %d open ticket(s) with new settings") % subcategory.cascade_done_count,
+                subtype_xmlid='mail.mt_note'
+            )
+    
     def unlink(self):
         """Override unlink to check for related tickets"""
         for record in self:
@@ -205,4 +298,6 @@ class HelpdeskSubcategory(models.Model):
                     (record.name, ticket_count)
                 )
         
-        return super(HelpdeskSubcategory, self).unlink()
+        result = super(HelpdeskSubcategory, self).unlink()
+        self.env.registry.clear_cache()
+        return result
@@ -1,13 +1,50 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from odoo.fields import Domain
+from odoo.tools import SQL, create_index, html2plaintext
+import json
+import logging
+import time
+
+import psycopg2
 from datetime import datetime, timedelta
+from collections import Counter, defaultdict, namedtuple
+
+from urllib.parse import urlencode
+
+from ..tools import ContinuousCalendar, WorkingCalendar, sanitize_email_content
+from .helpdesk_ticket_stats import STATS_TICKET_FIELDS
+
+_logger = logging.getLogger(__name__)
+
+# Group-based ticket rights of a user (see HelpdeskTicket._get_permission_context)
+PermissionContext = namedtuple('PermissionContext', ['is_supervisor', 'is_portal'])
 
 
 class HelpdeskTicket(models.Model):
     _inherit = 'helpdesk.ticket'
     _order = 'id desc'
     
+    # Conversation values accepted by the intake API (see _intake_conversations)
+    _intake_fields = [
+        'name', 'description', 'conversation_type', 'conversation_id', 'queue_name', 'agent_email',
+        'agent_name', 'source', 'email_content', 'caller_source', 'ticket_phone', 'ticket_email',
+    ]
+    
+    # Portal list sortings: (column, direction); id breaks ties so keyset cursors are unique
+    _portal_sort_keys = {
+        'date': ('create_date', 'DESC'),
+        'name': ('name', 'ASC'),
+        'status': ('status', 'ASC'),
+    }
+    
+    def init(self):
+        super(HelpdeskTicket, self).init()
+        # Serves the portal "My Tickets" keyset pages
+        create_index(self.env.cr, 'helpdesk_ticket_partner_id_create_date_id_index', self._table,
+                     ['partner_id', 'create_date DESC', 'id DESC'])
+    
     def action_archive(self):
         """Restrict archive action - only managers can archive from dashboard"""
         if not self.env.user.has_group('osool_helpdesk.group_helpdesk_manager'):
@@ -77,6 +114,12 @@ class HelpdeskTicket(models.Model):
     # Team Department
     team_department_id = fields.Many2one('helpdesk.team.department', string='Assigned To', tracking=True)
     department_notified = fields.Boolean(string='Department Notified', default=False, tracking=True)
+    department_notification_state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Department Notification', readonly=True, copy=False, tracking=True,
+        help='Delivery status of the department notification emails')
     lift_booking_invitation_sent = fields.Boolean(string='Lift Booking Invitation Sent', default=False, tracking=True)
     
     # Computed field to get department's sites for domain filtering
@@ -105,6 +148,7 @@ class HelpdeskTicket(models.Model):
     # Genesys Integration Fields
     conversation_type = fields.Char(string='Conversation Type', readonly=True, tracking=True)
     conversation_id = fields.Char(string='Conversation ID', readonly=True, tracking=True)
+    _conversation_id_uniq = models.UniqueIndex('(conversation_id) WHERE conversation_id IS NOT NULL')
     queue_name = fields.Char(string='Queue Name', readonly=True, tracking=True)
     agent_email = fields.Char(string='Agent Email', readonly=True, tracking=True)
     agent_name = fields.Char(string='Agent Name', readonly=True, tracking=True)
@@ -114,16 +158,17 @@ class HelpdeskTicket(models.Model):
     # Categories
     request_category_id = fields.Many2one('helpdesk.category', string='Category', tracking=True)
     request_subcategory_id = fields.Many2one('helpdesk.subcategory', string='Subcategory', tracking=True)
+    # Open, not yet escalated tickets per subcategory in creation order, for the escalation scheduler
+    _subcategory_escalation_idx = models.Index(
+        "(request_subcategory_id, create_date) WHERE escalated IS NOT TRUE"
+        " AND status NOT IN ('resolved', 'rejected', 'closed', 'cancelled')"
+    )
     
     @api.onchange('request_category_id')
     def _onchange_request_category_id(self):
-        """Auto-set form_type and department based on category selection"""
-        if self.request_category_id:
-            if self.request_category_id.form_type:
-                self.form_type = self.request_category_id.form_type
-            # Auto-assign department from category
-            if self.request_category_id.team_department_id:
-                self.team_department_id = self.request_category_id.team_department_id
+        """Auto-set form_type, department and team based on category selection"""
+        routing = self.env['helpdesk.category']._get_routing_vals(self.request_category_id._origin.id)
+        self.update({field: routing[field] for field in ('form_type', 'team_department_id', 'team_id') if field in routing})
         # Clear subcategory when category changes
         self.request_subcategory_id = False
     
@@ -161,8 +206,14 @@ class HelpdeskTicket(models.Model):
         ('maximo', 'Maximo'),
     ], string='Form Type', required=True, default='complaint', tracking=True)
     
+    # Idempotency key of the portal form that created the ticket
+    portal_submission_token = fields.Char(string='Portal Submission Token', readonly=True, copy=False)
+    _portal_submission_token_uniq = models.UniqueIndex(
+        '(partner_id, portal_submission_token) WHERE portal_submission_token IS NOT NULL'
+    )
+    
     # Ticket Number Display
-    ticket_number = fields.Char(string='Ticket #', compute='_compute_ticket_number', store=False)
+    ticket_number = fields.Char(string='Ticket #', compute='_compute_ticket_number', store=True, index=True)
     
     # Complaint specific fields
     complaint_type = fields.Selection([
@@ -269,7 +320,14 @@ class HelpdeskTicket(models.Model):
     # SLA Fields
     sla_id = fields.Many2one('helpdesk.sla', string='SLA Policy', tracking=True)
     sla_deadline = fields.Datetime(string='SLA Deadline', tracking=True)
+    sla_paused_since = fields.Datetime(string='SLA Paused Since', readonly=True, copy=False,
+                                       help='The SLA clock is stopped while the ticket waits for the customer')
     sla_failed = fields.Boolean(string='SLA Failed', compute='_compute_sla_failed', store=True)
+    # Open tickets whose SLA may still breach, in deadline order, for the breach sweeper
+    _sla_open_deadline_idx = models.Index(
+        "(sla_deadline) WHERE sla_deadline IS NOT NULL AND sla_failed IS NOT TRUE"
+        " AND sla_paused_since IS NULL AND status NOT IN ('closed', 'resolved')"
+    )
     response_deadline = fields.Datetime(string='Response Deadline', tracking=True)
     resolution_deadline = fields.Datetime(string='Resolution Deadline', tracking=True)
     
@@ -312,7 +370,8 @@ class HelpdeskTicket(models.Model):
     ], string='Requester Type', tracking=True)
     
     # Computed fields
-    days_open = fields.Integer(string='Days Open', compute='_compute_days_open', store=False)
+    # Stored so it can be sorted, grouped and filtered in SQL; refreshed hourly by cron
+    days_open = fields.Integer(string='Days Open', compute='_compute_days_open', store=True)
     
     is_partner_tenant = fields.Boolean(
         string='Is Tenant',
@@ -346,19 +405,205 @@ class HelpdeskTicket(models.Model):
         for ticket in self:
             ticket.is_partner_tenant = ticket.partner_id and ticket.partner_id.is_tenant
     
+    @api.depends('ticket_ref', 'name')
     def _compute_ticket_number(self):
-        """Extract ticket number from display_name (e.g., #00061 from 'Lift booking (#00061)')"""
-        import re
+        """Ticket number as shown in display_name (e.g., #00061 from 'Lift booking (#00061)')"""
         for ticket in self:
-            if ticket.display_name:
-                # Extract number pattern like (#00061) or #00061 from display_name
-                match = re.search(r'#(\d+)', ticket.display_name)
-                if match:
-                    ticket.ticket_number = f'#{match.group(1)}'
-                else:
-                    ticket.ticket_number = ticket.display_name
+            if ticket.ticket_ref:
+                ticket.ticket_number = f'#{ticket.ticket_ref}'
             else:
-                ticket.ticket_number = ''
+                ticket.ticket_number = ticket.name or ''
+    
+    @api.model
+    def _grouped_ticket_counts(self, field_name, records, extra_groupby=None):
+        """Count the tickets the current user can read per record of field_name.
+        Returns {record_id: count}, or {(record_id, extra_value): count} when extra_groupby is given.
+        
+        The helpdesk.ticket.stats rollup counts every ticket, so it is only used for users
+        that no ticket record rule restricts; the others get a grouped count of the tickets
+        they can read, like the search_count it replaces.
+        """
+        counts = defaultdict(int)
+        if not records.ids:
+            return counts
+        if self._ticket_rules_apply():
+            rows = self._count_readable_tickets(field_name, records.ids, extra_groupby)
+        else:
+            rows = self.env['helpdesk.ticket.stats']._count_by(field_name, records.ids, extra_groupby)
+        for *keys, count in rows:
+            counts[tuple(keys) if extra_groupby else keys[0]] += count
+        return counts
+    
+    @api.model
+    def _ticket_rules_apply(self):
+        """Whether ticket access rights or record rules restrict what the current user reads"""
+        if self.env.su:
+            return False
+        return not self.has_access('read') \
+            or not Domain(self.env['ir.rule']._compute_domain(self._name, 'read')).is_true()
+    
+    @api.model
+    def _count_readable_tickets(self, field_name, ids, extra_groupby=None):
+        """Rows of helpdesk.ticket.stats._count_by(), counted on the tickets the user can read"""
+        # stage_fold is a rollup column: group by stage and read its fold flag
+        groupby = [field_name] + (['stage_id' if extra_groupby == 'stage_fold' else extra_groupby] if extra_groupby else [])
+        rows = []
+        for record, *extra, count in self._read_group([(field_name, 'in', ids)], groupby, ['__count']):
+            if extra_groupby == 'stage_fold':
+                extra = [bool(extra[0].fold)]
+            rows.append((record.id, *extra, count))
+        return rows
+    
+    @api.model
+    def _stage_fold_ticket_counts(self, field_name, records):
+        """Return {record_id: (total, open, closed)}; tickets in folded stages count as closed"""
+        counts = defaultdict(lambda: [0, 0, 0])
+        for (record_id, stage_fold), count in self._grouped_ticket_counts(field_name, records, 'stage_fold').items():
+            counts[record_id][0] += count
+            counts[record_id][2 if stage_fold else 1] += count
+        return {record_id: tuple(values) for record_id, values in counts.items()}
+    
+    @api.model
+    def _portal_ticket_count(self, partner):
+        """Number of active tickets of the partner, read from the helpdesk.ticket.stats rollup
+        (kept up to date by create/write/unlink) instead of counting the tickets.
+        """
+        return self._grouped_ticket_counts('partner_id', partner)[partner.id]
+    
+    @api.model
+    def _intake_conversations(self, conversations):
+        """Upsert tickets for a batch of channel conversations (Genesys and others).
+        A conversation_id that already has a ticket updates it with the values that
+        changed (the unique index on conversation_id guarantees one ticket per
+        conversation); the other conversations are created with a single create(). Repeats
+        within the batch are merged, later values winning.
+        Returns one {'conversation_id', 'ticket_id', 'status'} dict per conversation,
+        status being 'created', 'updated' or 'invalid'.
+        """
+        caller_sources = dict(self._fields['caller_source'].selection)
+        results = []
+        pending = {}
+        for conversation in conversations:
+            conversation_id = conversation.get('conversation_id') if isinstance(conversation, dict) else False
+            if not conversation_id or not isinstance(conversation_id, str):
+                results.append({'conversation_id': conversation_id or False, 'ticket_id': False, 'status': 'invalid'})
+                continue
+            results.append({'conversation_id': conversation_id, 'ticket_id': False, 'status': 'updated'})
+            vals = {
+                field: conversation[field]
+                for field in self._intake_fields
+                if conversation.get(field) and isinstance(conversation[field], str)
+            }
+            if vals.get('caller_source') not in caller_sources:
+                vals.pop('caller_source', None)
+            pending.setdefault(conversation_id, {}).update(vals)
+        if not pending:
+            return results
+        
+        ticket_ids = {}
+        existing = self.with_context(active_test=False).search_fetch(
+            [('conversation_id', 'in', list(pending))], self._intake_fields,
+        )
+        for ticket in existing:
+            vals = pending.pop(ticket.conversation_id)
+            ticket_ids[ticket.conversation_id] = ticket.id
+            # The email content stays the one received with the first event
+            changes = {
+                field: value for field, value in vals.items()
+                if field != 'email_content' and ticket[field] != value
+            }
+            if changes:
+                ticket.write(changes)
+        
+        created = set(pending)
+        if pending:
+            for conversation_id, vals in pending.items():
+                vals.setdefault('name', _('Conversation %s') % conversation_id)
+                vals.setdefault('source', 'genesys')
+            try:
+                with self.env.cr.savepoint():
+                    tickets = self.create(list(pending.values()))
+            except psycopg2.errors.UniqueViolation as exc:
+                if exc.diag.constraint_name != f'{self._table}_conversation_id_uniq':
+                    raise
+                # Another transaction created one of these conversations since our snapshot:
+                # have the request retried, it will then update that ticket
+                raise psycopg2.errors.SerializationFailure(
+                    'Concurrent intake of the same conversation'
+                ) from exc
+            ticket_ids.update(zip(pending, tickets.ids))
+        
+        for result in results:
+            if result['status'] == 'invalid':
+                continue
+            result['ticket_id'] = ticket_ids[result['conversation_id']]
+            if result['conversation_id'] in created:
+                # Only the first occurrence in the batch counts as created
+                result['status'] = 'created'
+                created.discard(result['conversation_id'])
+        return results
+    
+    @api.model
+    def _portal_submission_ticket(self, partner, token):
+        """Ticket already created by the partner's portal submission with this token, if any"""
+        return self.with_context(active_test=False).search([
+            ('partner_id', '=', partner.id),
+            ('portal_submission_token', '=', token),
+        ], limit=1)
+    
+    @api.model
+    def _create_portal_submission(self, vals):
+        """Create the ticket of a portal submission, whose vals carry its portal_submission_token"""
+        try:
+            with self.env.cr.savepoint():
+                return self.create(vals)
+        except psycopg2.errors.UniqueViolation as exc:
+            if exc.diag.constraint_name != f'{self._table}_portal_submission_token_uniq':
+                raise
+            # A concurrent request with the same token created the ticket since our snapshot:
+            # have the request retried, its lookup will then find that ticket
+            raise psycopg2.errors.SerializationFailure(
+                'Concurrent portal submission with the same token'
+            ) from exc
+    
+    @api.model
+    def _portal_ticket_page(self, domain, sortby='date', after=None, before=None, limit=20):
+        """Return one page of the portal ticket list using keyset pagination.
+        ``after``/``before`` are the ids of the last/first ticket of the neighbouring page;
+        the page is read with an index range scan instead of an OFFSET.
+        Returns (tickets, next_cursor, previous_cursor); cursors are False at either end.
+        A cursor outside of ``domain`` (another customer's ticket) is ignored and the
+        first page is returned, so the sort values of that ticket never leak into the page.
+        """
+        if (after or before) and not self.search_count(domain + [('id', '=', after or before)], limit=1):
+            after = before = None
+        column, direction = self._portal_sort_keys[sortby]
+        backward = bool(before and not after)
+        cursor = before if backward else after
+        if backward:
+            direction = 'ASC' if direction == 'DESC' else 'DESC'
+        query = self._search(domain, order=f'{column} {direction}, id {direction}', limit=limit + 1)
+        if cursor:
+            query.add_where(SQL(
+                "(%s, %s) %s (SELECT %s, id FROM helpdesk_ticket WHERE id = %s)",
+                SQL.identifier(query.table, column), SQL.identifier(query.table, 'id'),
+                SQL('<' if direction == 'DESC' else '>'), SQL.identifier(column), cursor,
+            ))
+        ids = list(query.get_result_ids())
+        has_more = len(ids) > limit
+        ids = ids[:limit]
+        if backward:
+            ids.reverse()
+        tickets = self.browse(ids)
+        # Everything the list template displays, in three queries
+        tickets.fetch(['name', 'status', 'form_type', 'create_date', 'request_category_id', 'stage_id'])
+        tickets.request_category_id.fetch(['name'])
+        tickets.stage_id.fetch(['name'])
+        if not tickets:
+            return tickets, False, False
+        has_next = (not backward and has_more) or backward
+        has_previous = (backward and has_more) or bool(after)
+        return tickets, has_next and tickets[-1].id, has_previous and tickets[0].id
     
     @api.depends('source', 'create_uid')
     def _compute_created_via(self):
@@ -378,18 +623,25 @@ class HelpdeskTicket(models.Model):
             ticket.is_stage_assigned = ticket.stage_id.is_assigned if ticket.stage_id else False
             ticket.is_stage_in_progress = ticket.stage_id.is_in_progress if ticket.stage_id else False
     
+    @api.model
+    def _get_permission_context(self):
+        """Group-based rights of the current user on tickets. The flags are non-stored
+        fields of the user: evaluated once, then read from the environment cache for
+        the rest of the transaction (group changes invalidate them).
+        """
+        user = self.env.user
+        return PermissionContext(
+            is_supervisor=user.helpdesk_is_supervisor,
+            is_portal=user.helpdesk_is_portal,
+        )
+    
     def _compute_can_edit_ticket(self):
         """Check if current user can edit this ticket"""
+        is_supervisor = self._get_permission_context().is_supervisor
+        uid = self.env.uid
         for ticket in self:
-            # Supervisors (Team Leader or Manager) can edit all tickets
-            is_supervisor = self.env.user.has_group('osool_helpdesk.group_helpdesk_team_leader') or \
-                           self.env.user.has_group('osool_helpdesk.group_helpdesk_manager')
-            
-            # Agent can only edit their own tickets (where they are the ticket owner)
-            is_ticket_owner = ticket.user_id and ticket.user_id.id == self.env.user.id
-            
-            # Can edit if supervisor OR if they own the ticket
-            ticket.can_edit_ticket = is_supervisor or is_ticket_owner
+            # Can edit if supervisor OR if they own the ticket (Ticket Owner)
+            ticket.can_edit_ticket = is_supervisor or ticket.user_id.id == uid
     
     @api.depends('stage_id', 'stage_id.fold')
     def _compute_close_date(self):
@@ -421,7 +673,7 @@ class HelpdeskTicket(models.Model):
             else:
                 ticket.resolution_time_hours = 0.0
     
-    @api.depends('create_date')
+    @api.depends('create_date', 'status', 'date_closed')
     def _compute_days_open(self):
         for ticket in self:
             if ticket.create_date:
@@ -437,8 +689,158 @@ class HelpdeskTicket(models.Model):
             else:
                 ticket.days_open = 0
     
+    @api.model
+    def _days_open_sql(self):
+        """SQL expression of days_open, matching _compute_days_open"""
+        return """
+            CASE
+                WHEN create_date IS NULL THEN 0
+                WHEN status IN ('closed', 'cancelled') THEN
+                    COALESCE(EXTRACT(DAY FROM date_closed - create_date)::int, 0)
+                ELSE EXTRACT(DAY FROM (NOW() AT TIME ZONE 'UTC') - create_date)::int
+            END
+        """
+    
+    @api.model
+    def _cron_refresh_days_open(self):
+        """Refresh the stored days_open of tickets whose day count changed, in one UPDATE"""
+        self.flush_model(['create_date', 'status', 'date_closed', 'days_open'])
+        self.env.cr.execute(f"""
+            UPDATE helpdesk_ticket
+               SET days_open = {self._days_open_sql()}
+             WHERE days_open IS DISTINCT FROM {self._days_open_sql()}
+        """)
+        self.invalidate_model(['days_open'])
+    
+    # Tickets flagged and escalated per transaction by the SLA breach sweeper
+    _sla_sweep_batch_size = 1000
+    
+    @api.model
+    def _cron_sweep_sla_breaches(self):
+        """Flag open tickets whose SLA deadline passed, in batches walked through the
+        partial deadline index, and escalate them when their SLA says so"""
+        self.flush_model(['sla_deadline', 'sla_failed', 'sla_paused_since', 'status'])
+        started = time.monotonic()
+        flagged = escalated = 0
+        max_lag = None
+        while True:
+            now = fields.Datetime.now()
+            self.env.cr.execute("""
+                UPDATE helpdesk_ticket
+                   SET sla_failed = TRUE
+                 WHERE id IN (
+                    SELECT id FROM helpdesk_ticket
+                     WHERE sla_deadline IS NOT NULL AND sla_failed IS NOT TRUE
+                       AND sla_paused_since IS NULL AND status NOT IN ('closed', 'resolved')
+                       AND sla_deadline < %s
+                  ORDER BY sla_deadline
+                     LIMIT %s
+                       FOR UPDATE SKIP LOCKED
+                 )
+             RETURNING id, sla_deadline
+            """, (now, self._sla_sweep_batch_size))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            flagged += len(rows)
+            lag = now - min(deadline for _id, deadline in rows)
+            max_lag = max(lag, max_lag) if max_lag else lag
+            tickets = self.browse([ticket_id for ticket_id, _deadline in rows])
+            tickets.invalidate_recordset(['sla_failed'])
+            escalated += tickets._escalate_sla_breaches()
+            self.env.cr.commit()
+        _logger.info(
+            "SLA sweep: %s breached tickets flagged, %s escalated in %.2fs (longest detection lag: %s)",
+            flagged, escalated, time.monotonic() - started, max_lag or '-',
+        )
+    
+    def _escalate_sla_breaches(self):
+        """Escalate breached tickets whose SLA has auto escalation, one write per escalation user.
+        Returns the number of escalated tickets."""
+        to_escalate = self.filtered(
+            lambda ticket: ticket.sla_id.auto_escalate and ticket.sla_id.escalation_user_id and not ticket.escalated
+        )
+        now = fields.Datetime.now()
+        for user, tickets in to_escalate.grouped(lambda ticket: ticket.sla_id.escalation_user_id).items():
+            tickets.write({
+                'escalated': True,
+                'escalation_date': now,
+                'escalated_to_id': user.id,
+                'escalation_reason': _('SLA breached'),
+            })
+            tickets._log_audit_trail('escalated', 'Ticket escalated: SLA breached')
+        return len(to_escalate)
+    
+    # Tickets escalated per transaction by the subcategory escalation scheduler
+    _subcategory_escalation_batch_size = 1000
+    
+    @api.model
+    def _cron_escalate_overdue_tickets(self):
+        """Escalate open tickets created longer ago than the escalation time of their
+        subcategory, in batches read through the partial escalation index"""
+        self.flush_model(['request_subcategory_id', 'create_date', 'escalated', 'status'])
+        self.env['helpdesk.subcategory'].flush_model(['escalation_enabled', 'escalation_time', 'escalation_user_id'])
+        started = time.monotonic()
+        escalated = 0
+        while True:
+            # One index range scan per subcategory with escalation enabled
+            self.env.cr.execute("""
+                SELECT t.id, s.escalation_user_id, s.escalation_time
+                  FROM helpdesk_subcategory s
+            CROSS JOIN LATERAL (
+                    SELECT id FROM helpdesk_ticket
+                     WHERE request_subcategory_id = s.id
+                       AND escalated IS NOT TRUE
+                       AND status NOT IN ('resolved', 'rejected', 'closed', 'cancelled')
+                       AND create_date < %(now)s - make_interval(mins => s.escalation_time)
+                     LIMIT %(limit)s
+                       FOR UPDATE SKIP LOCKED
+                 ) t
+                 WHERE s.escalation_enabled AND s.escalation_user_id IS NOT NULL AND s.escalation_time > 0
+                 LIMIT %(limit)s
+            """, {'now': fields.Datetime.now(), 'limit': self._subcategory_escalation_batch_size})
+            rows = self.env.cr.fetchall()
+            if not rows:
+                break
+            self._escalate_overdue(rows)
+            escalated += len(rows)
+            self.env.cr.commit()
+            # Keep memory flat over tens of thousands of tickets
+            self.env.invalidate_all()
+        _logger.info("Subcategory escalation: %s tickets escalated in %.2fs", escalated, time.monotonic() - started)
+    
+    @api.model
+    def _escalate_overdue(self, rows):
+        """Escalate tickets given as (ticket_id, escalation_user_id, escalation_time) rows:
+        one write per escalation user and time, one batched chatter log and audit insert"""
+        from markupsafe import Markup
+        now = fields.Datetime.now()
+        groups = defaultdict(list)
+        for ticket_id, user_id, minutes in rows:
+            groups[user_id, minutes].append(ticket_id)
+        user_names = {user.id: user.name for user in self.env['res.users'].browse({user_id for user_id, _minutes in groups})}
+        bodies = {}
+        for (user_id, minutes), ticket_ids in groups.items():
+            tickets = self.browse(ticket_ids)
+            reason = _('Open for more than %s minutes in its subcategory', minutes)
+            # The chatter log below replaces the per-ticket tracking messages
+            tickets.with_context(mail_notrack=True).write({
+                'escalated': True,
+                'escalation_date': now,
+                'escalated_to_id': user_id,
+                'escalation_reason': reason,
+            })
+            tickets._log_audit_trail('escalated', f'Ticket escalated: {reason}')
+            body = Markup('<p><strong>%s</strong></p><p>%s</p>') % (
+                _('Ticket escalated to %s', user_names[user_id]), reason,
+            )
+            bodies.update(dict.fromkeys(ticket_ids, body))
+        self.browse(list(bodies))._message_log_batch(bodies=bodies)
+    
     @api.depends('sla_deadline')
     def _compute_sla_failed(self):
+        # A breach is not recomputed on status changes: resolving, closing or pausing
+        # the ticket keeps the flag, including the ones set by _cron_sweep_sla_breaches()
         now = fields.Datetime.now()
         for ticket in self:
             if ticket.sla_deadline:
@@ -446,49 +848,114 @@ class HelpdeskTicket(models.Model):
             else:
                 ticket.sla_failed = False
     
-    @api.onchange('request_category_id')
-    def _onchange_category(self):
-        if self.request_category_id:
-            self.request_subcategory_id = False
-            # Auto-assign team based on category
-            if self.request_category_id.team_id:
-                self.team_id = self.request_category_id.team_id
-    
     @api.onchange('request_subcategory_id')
     def _onchange_subcategory(self):
+        """Apply the subcategory routing defaults (assignee, team, SLA, priority), and the
+        Ticket Owner of the subcategory or else of the category"""
         if self.request_subcategory_id:
-            # Auto-assign based on routing rules
-            if self.request_subcategory_id.auto_assign_user_id:
-                self.user_id = self.request_subcategory_id.auto_assign_user_id
-            if self.request_subcategory_id.team_id:
-                self.team_id = self.request_subcategory_id.team_id
-            
-            # Set ticket owner from subcategory or category
-            if self.request_subcategory_id.ticket_owner_id:
-                self.ticket_owner_id = self.request_subcategory_id.ticket_owner_id
-            elif self.request_category_id and self.request_category_id.ticket_owner_id:
-                self.ticket_owner_id = self.request_category_id.ticket_owner_id
-            
-            # Set SLA and Priority
-            if self.request_subcategory_id.sla_id:
-                self.sla_id = self.request_subcategory_id.sla_id
-                # Set priority from SLA policy
-                if self.sla_id.ticket_priority:
-                    self.priority = self.sla_id.ticket_priority
-                self._compute_sla_deadlines()
-            else:
-                # No SLA policy, set to no priority (low)
-                self.priority = '0'
+            Category = self.env['helpdesk.category']
+            category_id, subcategory_id = self.request_category_id._origin.id, self.request_subcategory_id._origin.id
+            routing = Category._get_routing_vals(category_id, subcategory_id, inherit=False)
+            self.update({field: routing[field] for field in ('user_id', 'team_id', 'sla_id', 'priority') if field in routing})
+            owner_id = Category._get_routing_vals(category_id, subcategory_id).get('ticket_owner_id')
+            if owner_id:
+                self.ticket_owner_id = owner_id
+            if 'sla_id' in routing:
+                self.update(self._sla_deadline_values([(self.sla_id, self.team_id._origin)])[0])
+    
+    @api.model
+    def _sla_calendars(self, origin, teams):
+        """Working calendars of the given teams, compiled once per team, keyed by team id
+        (False for tickets without team). Working days, holidays (global leaves) and
+        timezone come from the team's resource calendar, the daily hours from the
+        team's work hours.
+        """
+        calendars = {}
+        for team in [*teams, self.env['helpdesk.team']]:
+            calendar = team.resource_calendar_id or self.env.company.resource_calendar_id
+            weekdays = {int(dayofweek) for dayofweek in calendar.attendance_ids.mapped('dayofweek')}
+            calendars[team.id] = WorkingCalendar(
+                calendar.tz or self.env.user.tz or 'UTC',
+                team.work_hours_start if team else 8.0,
+                team.work_hours_end if team else 17.0,
+                weekdays or range(7),
+                origin,
+                holidays=[
+                    (leave.date_from, leave.date_to)
+                    for leave in calendar.global_leave_ids if leave.date_to >= origin
+                ],
+            )
+        return calendars
+    
+    @api.model
+    def _sla_calendar(self, calendars, sla, team):
+        """Calendar the SLA clock of a ticket with this SLA and team runs on"""
+        if sla.use_working_hours:
+            return calendars[team.id]
+        return ContinuousCalendar()
+    
+    @api.model
+    def _sla_deadline_values(self, slas_teams, start=None):
+        """Deadlines of SLA clocks started at start (now): one dict of field values per
+        (sla, team) pair of records, empty for pairs without SLA. Working time only
+        counts for SLAs using working hours; calendars are compiled once per team.
+        """
+        start = start or fields.Datetime.now()
+        teams = self.env['helpdesk.team'].browse({team.id for sla, team in slas_teams if sla and team})
+        calendars = self._sla_calendars(start, teams)
+        result = []
+        for sla, team in slas_teams:
+            vals = {}
+            if sla:
+                calendar = self._sla_calendar(calendars, sla, team)
+                if sla.response_time:
+                    vals['response_deadline'] = calendar.add_minutes(start, sla.response_time)
+                if sla.resolution_time:
+                    vals['resolution_deadline'] = vals['sla_deadline'] = calendar.add_minutes(start, sla.resolution_time)
+            result.append(vals)
+        return result
     
-    def _compute_sla_deadlines(self):
+    def _write_sla_values(self, vals_by_ticket):
+        """Write SLA bookkeeping values given per ticket id: one write per group of tickets
+        sharing the same values, as superuser since they follow from the SLA whoever
+        owns the ticket"""
+        groups = defaultdict(list)
+        for ticket_id, vals in vals_by_ticket.items():
+            if vals:
+                groups[tuple(sorted(vals.items()))].append(ticket_id)
+        for vals, ticket_ids in groups.items():
+            self.browse(ticket_ids).sudo().write(dict(vals))
+    
+    def _compute_sla_deadlines(self, start=None):
+        """Set the response and resolution deadlines of the tickets' SLA from start (now)"""
+        tickets = self.filtered('sla_id')
+        if not tickets:
+            return
+        deadlines = self._sla_deadline_values([(ticket.sla_id, ticket.team_id) for ticket in tickets], start)
+        self._write_sla_values(dict(zip(tickets.ids, deadlines)))
+    
+    def _sla_pause(self):
+        """Stop the SLA clock while the tickets wait for the customer"""
+        if self:
+            self.write({'sla_paused_since': fields.Datetime.now()})
+    
+    def _sla_resume(self):
+        """Restart the SLA clock: deadlines move by the working time spent paused"""
+        if not self:
+            return
+        now = fields.Datetime.now()
+        calendars = self._sla_calendars(min(self.mapped('sla_paused_since')), self.team_id)
+        vals_by_ticket = {}
         for ticket in self:
-            if ticket.sla_id:
-                now = fields.Datetime.now()
-                if ticket.sla_id.response_time:
-                    ticket.response_deadline = now + timedelta(minutes=ticket.sla_id.response_time)
-                if ticket.sla_id.resolution_time:
-                    ticket.resolution_deadline = now + timedelta(minutes=ticket.sla_id.resolution_time)
-                    ticket.sla_deadline = ticket.resolution_deadline
+            calendar = self._sla_calendar(calendars, ticket.sla_id, ticket.team_id)
+            vals = vals_by_ticket[ticket.id] = {'sla_paused_since': False}
+            for field in ('response_deadline', 'resolution_deadline', 'sla_deadline'):
+                deadline = ticket[field]
+                # Deadlines already missed when the ticket was paused stay as they are
+                remaining = deadline and calendar.working_minutes(ticket.sla_paused_since, deadline)
+                if remaining and remaining > 0:
+                    vals[field] = calendar.add_minutes(now, remaining)
+        self._write_sla_values(vals_by_ticket)
     
     @api.model_create_multi
     def create(self, vals_list):
@@ -496,27 +963,16 @@ class HelpdeskTicket(models.Model):
             
             # Decode URL-encoded email content if present and clean formatting
             if vals.get('email_content'):
-                import urllib.parse
-                import re
-                # Decode URL encoding
-                content = urllib.parse.unquote(vals['email_content'])
-                # Remove quotation marks, asterisks, and special formatting characters
-                content = content.replace('"', '').replace('*', '').replace('_', '').replace('~', '')
-                content = content.replace('`', '').replace('=', '').replace('+', '').replace('-', '')
-                # Convert line breaks to HTML
-                content = content.replace('\r\n', '<br/>').replace('\n', '<br/>')
-                vals['email_content'] = content
+                vals['email_content'] = sanitize_email_content(vals['email_content'])
             
-            # Persist form_type from selected category if provided (server-side, works for portal and backend)
-            cat_id = vals.get('request_category_id')
-            if cat_id:
-                cat = self.env['helpdesk.category'].browse(cat_id)
-                if cat.exists():
-                    if cat.form_type and not vals.get('form_type'):
-                        vals['form_type'] = cat.form_type
-                    # Auto-assign department from category if not already set
-                    if cat.team_department_id and not vals.get('team_department_id'):
-                        vals['team_department_id'] = cat.team_department_id.id
+            # Routing defaults of the category/subcategory, the same for backend, portal and API;
+            # the Ticket Owner and assignee are resolved below
+            routing = self.env['helpdesk.category']._get_routing_vals(
+                vals.get('request_category_id'), vals.get('request_subcategory_id') or False,
+            )
+            for field in ('form_type', 'team_department_id', 'team_id', 'sla_id', 'priority'):
+                if field in routing and not vals.get(field):
+                    vals[field] = routing[field]
 
             if vals.get('partner_id') and not vals.get('partner_name'):
                 partner = self.env['res.partner'].browse(vals['partner_id'])
@@ -539,39 +995,71 @@ class HelpdeskTicket(models.Model):
             
             vals['date_last_stage_update'] = fields.Datetime.now()
         
+        # Ticket Owner: the agent matching agent_email, or the creator
+        owners = self.env['res.users']._resolve_agent_emails([vals.get('agent_email') for vals in vals_list])
+        for vals, owner in zip(vals_list, owners):
+            vals['ticket_owner_id'] = (owner or self.env.user).id
+        # Assignee routed for the whole batch (see _route_ticket_users)
+        user_ids = self._route_ticket_users(vals_list, owners)
+        
+        # SLA deadlines for the whole batch, one compiled calendar per team, created with the tickets
+        if any(vals.get('sla_id') for vals in vals_list):
+            default_team_id = self.default_get(['team_id']).get('team_id')
+            deadlines = self._sla_deadline_values([
+                (self.env['helpdesk.sla'].browse(vals.get('sla_id')),
+                 self.env['helpdesk.team'].browse(vals.get('team_id') or default_team_id))
+                for vals in vals_list
+            ])
+            for vals, deadline_vals in zip(vals_list, deadlines):
+                vals.update(deadline_vals)
+        
         tickets = super(HelpdeskTicket, self).create(vals_list)
         
-        # Send notification email and log audit for each ticket
-        for ticket in tickets:
-            # Auto-assign user_id (Ticket Owner) based on agent_email or creator
-            assigned_user = None
-            
-            # If agent_email is provided, find user with matching email
-            if ticket.agent_email:
-                agent_email_clean = ticket.agent_email.strip().lower()
-                assigned_user = self.env['res.users'].sudo().search([('login', '=', agent_email_clean)], limit=1)
-                if not assigned_user:
-                    assigned_user = self.env['res.users'].sudo().search([('email', '=', agent_email_clean)], limit=1)
-            
-            # If no agent_email or no matching user found, assign to creator
-            if not assigned_user:
-                assigned_user = ticket.create_uid
-            
-            # Set user_id (Ticket Owner) and ticket_owner_id
-            if assigned_user:
-                self.env.cr.execute(
-                    "UPDATE helpdesk_ticket SET user_id=%s WHERE id=%s",
-                    (assigned_user.id, ticket.id)
-                )
-                ticket.invalidate_recordset(['user_id'])
-                ticket.ticket_owner_id = assigned_user
-                
-            ticket._send_ticket_notification()
-            ticket._log_audit_trail('create', 'Ticket created')
+        # Set user_id (assignee) for all tickets with a single UPDATE
+        if tickets:
+            self.env.cr.execute("""
+                UPDATE helpdesk_ticket t
+                   SET user_id = v.user_id
+                  FROM unnest(%s::int[], %s::int[]) AS v(id, user_id)
+                 WHERE t.id = v.id
+            """, (tickets.ids, user_ids))
+            tickets.invalidate_recordset(['user_id'])
+            Stats = self.env['helpdesk.ticket.stats']
+            Stats._apply_deltas(Counter(), Stats._ticket_keys(tickets.ids))
+        
+        # Send notification emails and log audit for all tickets at once
+        tickets._send_ticket_notification()
+        tickets._log_audit_trail('create', 'Ticket created')
         
         return tickets
     
+    @api.model
+    def _route_ticket_users(self, vals_list, owners):
+        """Assignee of each new ticket, in order of precedence: the agent matching agent_email
+        (``owners``), the subcategory's Auto-Assign To user, the least-loaded agent of the
+        ticket's team (else the subcategory or category team) with room under max_tickets,
+        the Ticket Owner.
+        """
+        Category = self.env['helpdesk.category']
+        user_ids = []
+        routing = {}
+        for index, (vals, owner) in enumerate(zip(vals_list, owners)):
+            defaults = Category._get_routing_vals(vals.get('request_category_id'), vals.get('request_subcategory_id') or False)
+            user_ids.append(owner.id or defaults.get('user_id'))
+            team_id = vals.get('team_id') or defaults.get('team_id')
+            if not user_ids[-1] and team_id:
+                routing[index] = team_id
+        if routing:
+            agent_ids = self.env['helpdesk.agent.load']._assign_agents(list(routing.values()))
+            for index, agent_id in zip(routing, agent_ids):
+                user_ids[index] = agent_id
+        return [user_id or vals['ticket_owner_id'] for vals, user_id in zip(vals_list, user_ids)]
+    
     def write(self, vals):
+        # Email content gets the same cleanup as on create
+        if vals.get('email_content'):
+            vals['email_content'] = sanitize_email_content(vals['email_content'])
+        
         # Track first assignment date
         if 'user_id' in vals and vals.get('user_id'):
             for ticket in self:
@@ -582,34 +1070,27 @@ class HelpdeskTicket(models.Model):
         if not self.env.su:
             # Check write access: Only ticket owner can modify (except managers/team leaders)
             current_user = self.env.user
-            is_manager = current_user.has_group('osool_helpdesk.group_helpdesk_manager')
-            is_team_leader = current_user.has_group('osool_helpdesk.group_helpdesk_team_leader')
-            is_portal = current_user.has_group('base.group_portal')
+            permissions = self._get_permission_context()
             
             # Allow managers and team leaders to edit any ticket
             # Also allow portal users to edit their own tickets (where they are the customer)
-            if not is_manager and not is_team_leader:
-                for ticket in self:
-                    # Portal users can edit tickets where they are the customer
-                    if is_portal:
-                        if ticket.partner_id != current_user.partner_id:
-                            raise UserError(_('You can only modify your own tickets.'))
-                    # Internal users: Only the ticket owner (user_id) can edit
-                    elif ticket.user_id and ticket.user_id != current_user:
-                        raise UserError(_('Only the Ticket Owner can modify this ticket.'))
+            if not permissions.is_supervisor:
+                if permissions.is_portal:
+                    if self.filtered(lambda ticket: ticket.partner_id != current_user.partner_id):
+                        raise UserError(_('You can only modify your own tickets.'))
+                # Internal users: Only the ticket owner (user_id) can edit; unowned tickets are open to all
+                elif self.user_id - current_user:
+                    raise UserError(_('Only the Ticket Owner can modify this ticket.'))
         
         # If category changes, align form_type and department accordingly to keep correct tab after save
         if 'request_category_id' in vals:
-            cat_id = vals.get('request_category_id')
-            if cat_id:
-                cat = self.env['helpdesk.category'].browse(cat_id)
-                if cat.exists():
-                    if cat.form_type:
-                        # Align form_type to the category consistently when category changes
-                        vals['form_type'] = cat.form_type
-                    # Auto-assign department from category if category has a department
-                    if cat.team_department_id and not vals.get('team_department_id'):
-                        vals['team_department_id'] = cat.team_department_id.id
+            routing = self.env['helpdesk.category']._get_routing_vals(vals['request_category_id'])
+            if 'form_type' in routing:
+                # Align form_type to the category consistently when category changes
+                vals['form_type'] = routing['form_type']
+            # Auto-assign department from category if category has a department
+            if 'team_department_id' in routing and not vals.get('team_department_id'):
+                vals['team_department_id'] = routing['team_department_id']
 
         # Check if stage is being changed
         stage_is_rejected = False
@@ -650,21 +1131,50 @@ class HelpdeskTicket(models.Model):
             elif vals.get('status') == 'closed' and not self.date_closed:
                 vals['date_closed'] = fields.Datetime.now()
         
-        # Log audit trail - store old values before write
-        old_values = {}
-        for ticket in self:
-            old_values[ticket.id] = {}
-            for field in vals.keys():
-                if field in ticket._fields:
-                    field_value = ticket[field]
-                    # Convert Many2one records to IDs for comparison
-                    if hasattr(field_value, 'id'):
-                        old_values[ticket.id][field] = field_value.id
-                    else:
-                        old_values[ticket.id][field] = field_value
+        # A new SLA restarts the deadlines: they go in this write when all tickets get the
+        # same ones (same team calendar), else in one write per group of tickets afterwards
+        sla_deadlines = None
+        if vals.get('sla_id'):
+            sla = self.env['helpdesk.sla'].browse(vals['sla_id'])
+            new_team = self.env['helpdesk.team'].browse(vals['team_id']) if 'team_id' in vals else None
+            sla_deadlines = self._sla_deadline_values([
+                (sla, ticket.team_id if new_team is None else new_team) for ticket in self
+            ])
+            if all(deadlines == sla_deadlines[0] for deadlines in sla_deadlines):
+                vals.update(sla_deadlines[0] if sla_deadlines else {})
+                sla_deadlines = None
+        
+        # Log audit trail - store old values before write (one read for all tickets)
+        audited_fields = [field for field in vals if field in self._fields]
+        self.fetch(audited_fields)
+        old_values = {
+            ticket.id: {field: ticket._audit_value(field) for field in audited_fields}
+            for ticket in self
+        }
+        
+        # Keep the statistics rollup in sync when a counted dimension changes
+        Stats = self.env['helpdesk.ticket.stats']
+        track_stats = bool(STATS_TICKET_FIELDS.intersection(vals))
+        if track_stats:
+            stats_before = Stats._ticket_keys(self.ids)
+        
+        # The SLA clock is paused while tickets wait for the customer
+        if 'status' in vals:
+            was_pending = self.filtered(lambda ticket: ticket.status == 'pending_customer')
         
         result = super(HelpdeskTicket, self).write(vals)
         
+        if track_stats:
+            Stats._apply_deltas(stats_before, Stats._ticket_keys(self.ids))
+        
+        if 'status' in vals:
+            if vals['status'] == 'pending_customer':
+                (self - was_pending).filtered('sla_id')._sla_pause()
+            else:
+                was_pending.filtered('sla_paused_since')._sla_resume()
+        if sla_deadlines:
+            self._write_sla_values(dict(zip(self.ids, sla_deadlines)))
+        
         # Auto-assign to ticket owner if ticket is rejected
         if stage_is_rejected:
             for ticket in self:
@@ -678,79 +1188,100 @@ class HelpdeskTicket(models.Model):
         
         # Call update_form_state when stage changes
         if 'stage_id' in vals:
-            for ticket in self:
-                ticket.update_form_state()
+            self.update_form_state()
         
-        # Create audit log
-        for ticket in self:
-            for field, new_value in vals.items():
-                if field in old_values.get(ticket.id, {}):
-                    old_val = old_values[ticket.id][field]
-                    if old_val != new_value:
-                        ticket._log_audit_trail('write', f'Updated {field}', old_val, new_value)
+        # Create audit log, written in bulk with the rest of the transaction
+        self.env['helpdesk.audit']._buffer([
+            ticket._prepare_audit_values('write', f'Updated {field}', old_val, vals[field])
+            for ticket in self
+            for field, old_val in old_values[ticket.id].items()
+            if old_val != vals[field]
+        ])
         
         return result
     
+    def unlink(self):
+        Stats = self.env['helpdesk.ticket.stats']
+        stats_before = Stats._ticket_keys(self.ids)
+        result = super(HelpdeskTicket, self).unlink()
+        Stats._apply_deltas(stats_before, Counter())
+        return result
+    
+    def _audit_value(self, field):
+        """Return the comparable value of a field for the audit trail (relations as ids)"""
+        self.ensure_one()
+        field_value = self[field]
+        # Convert Many2one records to IDs for comparison
+        if hasattr(field_value, 'id'):
+            return field_value.id
+        return field_value
+    
+    # Stage flags handled by update_form_state, the first one set on the stage wins
+    _stage_transition_flags = ['is_new', 'is_assigned', 'is_in_progress', 'is_resolved', 'is_closed']
+    
     def update_form_state(self):
         """
         Called when stage changes to perform stage-specific actions
         This method can be extended to add custom logic for different stages
+        
+        Works on any number of tickets: they are grouped by the flag of the stage they
+        reached, and each group gets one write for its date/status side effect and one
+        batched audit entry per description.
         """
-        self.ensure_one()
+        def transition(ticket):
+            return next((flag for flag in self._stage_transition_flags if ticket.stage_id[flag]), False)
+        
+        groups = self.grouped(transition)
+        now = fields.Datetime.now()
         
         # Actions when moving to New stage
-        if self.is_stage_new:
-            self._log_audit_trail('stage_change', f'Ticket moved to New stage')
+        if tickets := groups.get('is_new'):
+            tickets._log_audit_trail('stage_change', 'Ticket moved to New stage')
         
         # Actions when moving to Assigned stage
-        elif self.is_stage_assigned:
+        if tickets := groups.get('is_assigned'):
             # Ensure department is set
-            if not self.team_department_id:
+            if tickets.filtered(lambda ticket: not ticket.team_department_id):
                 raise UserError(_('Department must be selected when moving to Assigned stage.'))
             
             # Log the assignment
-            self._log_audit_trail('stage_change', f'Ticket assigned to department: {self.team_department_id.name}')
+            for department, department_tickets in tickets.grouped('team_department_id').items():
+                department_tickets._log_audit_trail('stage_change', f'Ticket assigned to department: {department.name}')
             
             # Set assignment date if not already set
-            if not self.date_assigned:
-                self.date_assigned = fields.Datetime.now()
+            tickets.filtered(lambda ticket: not ticket.date_assigned).write({'date_assigned': now})
         
         # Actions when moving to In Progress stage
-        elif self.is_stage_in_progress:
-            self._log_audit_trail('stage_change', f'Ticket moved to In Progress')
+        if tickets := groups.get('is_in_progress'):
+            tickets._log_audit_trail('stage_change', 'Ticket moved to In Progress')
             
             # Update status if needed
-            if self.status != 'in_progress':
-                self.status = 'in_progress'
+            tickets.filtered(lambda ticket: ticket.status != 'in_progress').write({'status': 'in_progress'})
         
         # Actions when moving to Resolved stage
-        elif self.stage_id.is_resolved:
-            if not self.date_resolved:
-                self.date_resolved = fields.Datetime.now()
-            self._log_audit_trail('stage_change', f'Ticket resolved')
+        if tickets := groups.get('is_resolved'):
+            tickets.filtered(lambda ticket: not ticket.date_resolved).write({'date_resolved': now})
+            tickets._log_audit_trail('stage_change', 'Ticket resolved')
         
         # Actions when moving to Closed stage
-        elif self.stage_id.is_closed:
-            if not self.date_closed:
-                self.date_closed = fields.Datetime.now()
+        if tickets := groups.get('is_closed'):
+            tickets.filtered(lambda ticket: not ticket.date_closed).write({'date_closed': now})
             
             # Send satisfaction survey if not already sent
-            if not self.survey_sent:
-                self._send_survey()
+            tickets.filtered(lambda ticket: not ticket.survey_sent)._send_survey()
             
-            self._log_audit_trail('stage_change', f'Ticket closed')
+            tickets._log_audit_trail('stage_change', 'Ticket closed')
     
     def _send_ticket_notification(self):
-        """Send email notification when ticket is created"""
-        self.ensure_one()
+        """Send email notification when tickets are created"""
         template = self.env.ref('osool_helpdesk.mail_template_ticket_created', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=False)
+        if template and self:
+            template.send_mail_batch(self.ids, force_send=False)
     
-    def _log_audit_trail(self, action, description, old_value=None, new_value=None):
-        """Create audit trail record"""
+    def _prepare_audit_values(self, action, description, old_value=None, new_value=None):
+        """Return the values of one helpdesk.audit record for this ticket"""
         self.ensure_one()
-        self.env['helpdesk.audit'].create({
+        return {
             'ticket_id': self.id,
             'user_id': self.env.user.id,
             'action': action,
@@ -758,7 +1289,14 @@ class HelpdeskTicket(models.Model):
             'old_value': str(old_value) if old_value else False,
             'new_value': str(new_value) if new_value else False,
             'timestamp': fields.Datetime.now(),
-        })
+        }
+    
+    def _log_audit_trail(self, action, description, old_value=None, new_value=None):
+        """Queue audit trail records for all tickets; they are written in bulk at commit"""
+        self.env['helpdesk.audit']._buffer([
+            ticket._prepare_audit_values(action, description, old_value, new_value)
+            for ticket in self
+        ])
     
     def action_escalate(self):
         """Open escalation wizard"""
@@ -831,12 +1369,17 @@ class HelpdeskTicket(models.Model):
         }
     
     def action_send_team_department_notification(self):
-        """Send email notification to all teams under the selected department"""
+        """Queue email notification to all teams under the selected department.
+        Emails are delivered by the mail queue; department_notified is set once all are sent.
+        """
         self.ensure_one()
         
         if self.department_notified:
             raise UserError(_('Notification has already been sent for this ticket.'))
         
+        if self.department_notification_state == 'queued':
+            raise UserError(_('Notification is already queued for this ticket.'))
+        
         if not self.team_department_id:
             raise UserError(_('No department assigned to this ticket.'))
         
@@ -846,102 +1389,8 @@ class HelpdeskTicket(models.Model):
         if not notification_emails:
             raise UserError(_('No notification emails configured for department: %s') % self.team_department_id.name)
         
-        # Prepare email body with all ticket details
-        priority_display = dict(self._fields['priority'].selection).get(self.priority, 'N/A')
-        channel_display = dict(self._fields['caller_source'].selection).get(self.caller_source, 'N/A') if self.caller_source else 'N/A'
-        category_display = self.request_category_id.name if self.request_category_id else 'N/A'
-        subcategory_display = self.request_subcategory_id.name if self.request_subcategory_id else 'N/A'
-        
-        body = _('''
-            <div style="font-family: Arial, sans-serif; font-size: 14px;">
-                <h3 style="color: #875A7B;">New Ticket Assigned to: %s</h3>
-                <table style="width: 100%%; border-collapse: collapse; margin-top: 20px;">
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; width: 30%%; background-color: #f5f5f5;">Ticket Number:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Subject:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Site:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Department:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Priority:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Category:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Subcategory:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Channel:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Name:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Phone:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Email:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Building:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Floor:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                    <tr>
-                        <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5; vertical-align: top;">Description:</td>
-                        <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
-                    </tr>
-                </table>
-                <p style="margin-top: 20px;">
-                    <a href="/web#id=%s&model=helpdesk.ticket&view_type=form" 
-                       style="background-color: #875A7B; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
-                        View Ticket
-                    </a>
-                </p>
-                <p style="margin-top: 20px; color: #666; font-size: 12px;">
-                    This is an automated notification from <strong>Osool Care</strong>.<br/>
-                    Please do not reply to this email.
-                </p>
-            </div>
-        ''') % (
-            self.team_department_id.name if self.team_department_id else 'N/A',
-            self.display_name or str(self.id),
-            self.name or 'N/A',
-            self.site_id.name if self.site_id else 'N/A',
-            self.team_department_id.name if self.team_department_id else 'N/A',
-            priority_display,
-            category_display,
-            subcategory_display,
-            channel_display,
-            self.partner_id.name if self.partner_id else 'N/A',
-            self.partner_phone or self.ticket_phone or 'N/A',
-            self.partner_email or self.ticket_email or 'N/A',
-            self.ticket_building or 'N/A',
-            self.ticket_floor or 'N/A',
-            self.description or 'No description provided',
-            self.id
-        )
+        # Render the email body once; all recipients share it
+        body = self._render_department_notification_body()
         
         # Collect CC emails from site (Project Managers, etc.)
         site_cc_emails = []
@@ -950,7 +1399,7 @@ class HelpdeskTicket(models.Model):
         
         cc_list = ', '.join(site_cc_emails) if site_cc_emails else False
         
-        # Send email to each notification address
+        # Queue one email per notification address
         mail_values_list = []
         for notif_email in notification_emails:
             mail_values = {
@@ -963,46 +1412,40 @@ class HelpdeskTicket(models.Model):
                 'auto_delete': False,
                 'model': 'helpdesk.ticket',
                 'res_id': self.id,
+                'department_notification_ticket_id': self.id,
             }
             mail_values_list.append(mail_values)
         
-        # Create and send emails
-        if mail_values_list:
-            mail_ids = self.env['mail.mail'].sudo().create(mail_values_list)
-            mail_ids.send()
+        # Emails of a previous failed attempt no longer decide the status
+        self.env['mail.mail'].sudo().search([
+            ('department_notification_ticket_id', '=', self.id),
+        ]).department_notification_ticket_id = False
         
-        # Mark as notified
-        self.department_notified = True
+        # Emails are sent by the mail queue worker, which retries failed deliveries
+        self.env['mail.mail'].sudo().create(mail_values_list)
+        self.department_notification_state = 'queued'
+        self.env.ref('mail.ir_cron_mail_scheduler_action')._trigger()
         
         # Log audit trail
         email_list = ', '.join(notification_emails.mapped('email'))
-        self._log_audit_trail('notification', 'Email notification sent to: %s' % email_list)
+        self._log_audit_trail('notification', 'Email notification queued to: %s' % email_list)
         
-        # Post message to chatter with email content
+        # Post a summary to chatter; the emails themselves are linked to the ticket
         from markupsafe import Markup
         
-        cc_display = f"<br/><strong>CC:</strong> {cc_list}" if cc_list else ""
-        
         chatter_body = Markup(
-            '<div style="margin-bottom: 15px;">'
-            '<strong>Department Notification Sent</strong><br/>'
-            '<strong>Department:</strong> {}<br/>'
-            '<strong>Recipients:</strong> {}{}'
-            '</div>'
-            '<hr/>'
-            '<div style="margin-top: 15px; padding: 15px; border: 1px solid #ddd; background-color: #f9f9f9;">'
-            '{}'
-            '</div>'
-        ).format(
-            Markup(self.team_department_id.name),
-            Markup(email_list),
-            Markup(cc_display),
-            Markup(body)
+            '<strong>Department Notification Queued</strong><br/>'
+            '<strong>Department:</strong> %s<br/>'
+            '<strong>Recipients:</strong> %s%s'
+        ) % (
+            self.team_department_id.name,
+            email_list,
+            Markup('<br/><strong>CC:</strong> %s') % cc_list if cc_list else '',
         )
         
         self.message_post(
             body=chatter_body,
-            subject=_('Department Notification Sent'),
+            subject=_('Department Notification Queued'),
             message_type='notification',
             subtype_xmlid='mail.mt_note',
         )
@@ -1011,13 +1454,68 @@ class HelpdeskTicket(models.Model):
             'type': 'ir.actions.client',
             'tag': 'display_notification',
             'params': {
-                'title': _('Notification Sent'),
-                'message': _('Email notification sent to %s recipient(s).') % len(notification_emails),
+                'title': _('Notification Queued'),
+                'message': _('Email notification queued for %s recipient(s).') % len(notification_emails),
                 'type': 'success',
                 'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
             }
         }
     
+    def _render_department_notification_body(self):
+        """Render the department notification email body from its QWeb template.
+        ir.qweb compiles the template once and caches it per language.
+        """
+        self.ensure_one()
+        labels = {
+            'priority': dict(self._fields['priority']._description_selection(self.env)),
+            'caller_source': dict(self._fields['caller_source']._description_selection(self.env)),
+        }
+        na = _('N/A')
+        values = {
+            'ticket': self,
+            'department_name': self.team_department_id.name or na,
+            'rows': [
+                (_('Ticket Number'), self.display_name or str(self.id)),
+                (_('Subject'), self.name or na),
+                (_('Site'), self.site_id.name or na),
+                (_('Department'), self.team_department_id.name or na),
+                (_('Priority'), labels['priority'].get(self.priority, na)),
+                (_('Category'), self.request_category_id.name or na),
+                (_('Subcategory'), self.request_subcategory_id.name or na),
+                (_('Channel'), labels['caller_source'].get(self.caller_source, na)),
+                (_('Customer Name'), self.partner_id.name or na),
+                (_('Customer Phone'), self.partner_phone or self.ticket_phone or na),
+                (_('Customer Email'), self.partner_email or self.ticket_email or na),
+                (_('Building'), self.ticket_building or na),
+                (_('Floor'), self.ticket_floor or na),
+                (_('Description'), self.description or _('No description provided')),
+            ],
+        }
+        return self.env['ir.qweb']._render('osool_helpdesk.department_notification_body', values)
+    
+    def _update_department_notification_state(self):
+        """Derive the department notification status from its queued emails"""
+        mails = self.env['mail.mail'].sudo().search([
+            ('department_notification_ticket_id', 'in', self.ids),
+        ])
+        max_attempts = mails._department_notification_max_attempts
+        for ticket in self.filtered(lambda t: t.department_notification_state == 'queued'):
+            ticket_mails = mails.filtered(lambda m: m.department_notification_ticket_id == ticket)
+            if not ticket_mails:
+                continue
+            if any(mail.state == 'cancel'
+                   or (mail.state == 'exception' and mail.department_notification_attempts >= max_attempts)
+                   for mail in ticket_mails):
+                ticket.department_notification_state = 'failed'
+                ticket._log_audit_trail('notification', 'Email notification delivery failed')
+            elif all(mail.state == 'sent' for mail in ticket_mails):
+                ticket.write({
+                    'department_notification_state': 'sent',
+                    'department_notified': True,
+                })
+                ticket._log_audit_trail('notification', 'Email notification sent to: %s' % ', '.join(ticket_mails.mapped('email_to')))
+    
     def action_send_lift_booking_invitation(self):
         """Send lift booking calendar invitation via Microsoft Graph API"""
         import requests
@@ -1212,12 +1710,13 @@ class HelpdeskTicket(models.Model):
             raise UserError(_('Error sending calendar invitation: %s') % str(e))
     
     def _send_survey(self):
-        """Send satisfaction survey to customer"""
-        self.ensure_one()
+        """Send satisfaction survey to the customers of the tickets; one write flags them all"""
         survey = self.env.ref('osool_helpdesk.ticket_satisfaction_survey', raise_if_not_found=False)
-        if survey and self.partner_id:
-            survey._create_answer(partner=self.partner_id)
-            self.write({'survey_sent': True, 'survey_id': survey.id})
+        tickets = self.filtered('partner_id')
+        if survey and tickets:
+            for ticket in tickets:
+                survey._create_answer(partner=ticket.partner_id)
+            tickets.write({'survey_sent': True, 'survey_id': survey.id})
 
     def action_open_tenant_profile(self):
         """Open the full Tenant (res.partner) profile of the ticket's partner.
@@ -1262,3 +1761,122 @@ class HelpdeskTicket(models.Model):
             'url': url,
             'target': 'new',
         }
+    
+    # Raw Data Export: (header, model and field providing the value, join alias)
+    _raw_export_columns = [
+        ('Ticket ID', 'helpdesk.ticket', 'id', 't'),
+        ('Ticket #', 'helpdesk.ticket', 'ticket_number', 't'),
+        ('Subject', 'helpdesk.ticket', 'name', 't'),
+        ('Creation Date', 'helpdesk.ticket', 'create_date', 't'),
+        ('First Assignment Date', 'helpdesk.ticket', 'assign_date', 't'),
+        ('Closure Date', 'helpdesk.ticket', 'close_date', 't'),
+        ('Customer', 'res.partner', 'name', 'partner'),
+        ('Email', 'helpdesk.ticket', 'partner_email', 't'),
+        ('Phone', 'helpdesk.ticket', 'partner_phone', 't'),
+        ('Site', 'helpdesk.site', 'name', 'site'),
+        ('Ticket Owner', 'res.partner', 'name', 'owner'),
+        ('Team', 'helpdesk.team', 'name', 'team'),
+        ('Department', 'helpdesk.team.department', 'name', 'department'),
+        ('Category', 'helpdesk.category', 'name', 'category'),
+        ('Subcategory', 'helpdesk.subcategory', 'name', 'subcategory'),
+        ('Stage', 'helpdesk.stage', 'name', 'stage'),
+        ('Status', 'helpdesk.ticket', 'status', 't'),
+        ('Priority', 'helpdesk.ticket', 'priority', 't'),
+        ('Channel', 'helpdesk.ticket', 'caller_source', 't'),
+        ('Created Via', 'helpdesk.ticket', 'created_via', 't'),
+        ('Response Time (Hours)', 'helpdesk.ticket', 'response_time_hours', 't'),
+        ('Resolution Time (Hours)', 'helpdesk.ticket', 'resolution_time_hours', 't'),
+        ('Days Open', 'helpdesk.ticket', 'days_open', 't'),
+        ('SLA Deadline', 'helpdesk.ticket', 'sla_deadline', 't'),
+        ('Description', 'helpdesk.ticket', 'description', 't'),
+    ]
+    
+    @api.model
+    def _raw_export_select_sql(self):
+        """Return the SQL SELECT list of the Raw Data Export, with datetimes in the
+        user's timezone and translated names in the user's language"""
+        lang = self.env.lang or 'en_US'
+        tz = self.env.context.get('tz') or self.env.user.tz or 'UTC'
+        columns = []
+        for header, model_name, field_name, alias in self._raw_export_columns:
+            field = self.env[model_name]._fields[field_name]
+            column = SQL.identifier(alias, field_name)
+            if field.translate:
+                column = SQL("COALESCE(%s->>%s, %s->>'en_US')", column, lang, column)
+            elif field.type == 'datetime':
+                column = SQL("%s AT TIME ZONE 'UTC' AT TIME ZONE %s", column, tz)
+            columns.append(column)
+        return SQL(', ').join(columns)
+    
+    @api.model
+    def action_export_raw_data(self, file_format, domain):
+        """Open the streaming Raw Data Export for the given domain"""
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/helpdesk/ticket/export/%s?%s' % (file_format, urlencode({'domain': json.dumps(domain)})),
+            'target': 'self',
+        }
+    
+    def action_export_raw_records(self, file_format):
+        """Open the streaming Raw Data Export for the selected tickets.
+        active_domain is always in the context of a list action, so it is only used when
+        the whole filtered list was selected: then every matching ticket is selected, or the
+        web client truncated the selection at web.active_ids_limit.
+        """
+        domain = [('id', 'in', self.ids)]
+        active_domain = self.env.context.get('active_domain')
+        if active_domain is not None:
+            limit = int(self.env['ir.config_parameter'].sudo().get_param('web.active_ids_limit', 20000))
+            if len(self) >= limit or self.search_count(active_domain, limit=len(self) + 1) == len(self):
+                domain = active_domain
+        return self.action_export_raw_data(file_format, domain)
+    
+    @api.model
+    def _raw_export_rows(self, domain, chunk_size=5000):
+        """Yield the header and rows of the Raw Data Export for tickets matching domain.
+        Tickets are read in keyset-paginated chunks on id so memory stays bounded;
+        record rules apply through _search.
+        """
+        yield [_(header) for header, *dummy in self._raw_export_columns]
+        
+        selections = {
+            index: dict(self._fields[field_name]._description_selection(self.env))
+            for index, (header, model_name, field_name, alias) in enumerate(self._raw_export_columns)
+            if model_name == self._name and self._fields[field_name].type == 'selection'
+        }
+        html_columns = [
+            index for index, (header, model_name, field_name, alias) in enumerate(self._raw_export_columns)
+            if self.env[model_name]._fields[field_name].type == 'html'
+        ]
+        select_sql = self._raw_export_select_sql()
+        self.env.flush_all()
+        
+        last_id = 0
+        while True:
+            query = self._search(list(domain) + [('id', '>', last_id)], order='id', limit=chunk_size)
+            self.env.cr.execute(SQL("""
+                SELECT %s
+                  FROM helpdesk_ticket t
+             LEFT JOIN res_partner partner ON partner.id = t.partner_id
+             LEFT JOIN helpdesk_site site ON site.id = t.site_id
+             LEFT JOIN res_users owner_user ON owner_user.id = t.user_id
+             LEFT JOIN res_partner owner ON owner.id = owner_user.partner_id
+             LEFT JOIN helpdesk_team team ON team.id = t.team_id
+             LEFT JOIN helpdesk_team_department department ON department.id = t.team_department_id
+             LEFT JOIN helpdesk_category category ON category.id = t.request_category_id
+             LEFT JOIN helpdesk_subcategory subcategory ON subcategory.id = t.request_subcategory_id
+             LEFT JOIN helpdesk_stage stage ON stage.id = t.stage_id
+                 WHERE t.id IN %s
+              ORDER BY t.id
+            """, select_sql, query.subselect()))
+            rows = self.env.cr.fetchall()
+            if not rows:
+                return
+            for row in rows:
+                row = list(row)
+                for index, labels in selections.items():
+                    row[index] = labels.get(row[index], row[index])
+                for index in html_columns:
+                    row[index] = html2plaintext(row[index]) if row[index] else ''
+                yield row
+            last_id = rows[-1][0]
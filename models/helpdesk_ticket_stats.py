@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import logging
+from collections import Counter
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Dimensions of the rollup, named after the helpdesk.ticket columns they come from
+STATS_DIMENSIONS = [
+    'site_id',
+    'team_department_id',
+    'request_category_id',
+    'request_subcategory_id',
+    'partner_id',
+    'user_id',
+]
+
+# Ticket fields whose change moves a ticket from one rollup row to another
+# (team_id recomputes stage_id in the helpdesk module)
+STATS_TICKET_FIELDS = set(STATS_DIMENSIONS) | {'stage_id', 'status', 'active', 'team_id'}
+
+
+def _sort_key(key):
+    """Order of a rollup key in the unique index (NULL dimensions count as 0)"""
+    return (*(value or 0 for value in key[:-2]), bool(key[-2]), key[-1] or '')
+
+
+class HelpdeskTicketStats(models.Model):
+    """Materialized count of active tickets per (site, department, category,
+    subcategory, partner, user, stage fold, status).
+
+    Maintained incrementally by helpdesk.ticket create/write/unlink through
+    ``_ticket_keys()`` and ``_apply_deltas()``; ``_rebuild()`` recomputes it
+    from scratch. Counts are global and do not apply ticket record rules.
+    The per-agent counters of helpdesk.agent.load follow the same deltas.
+    """
+    _name = 'helpdesk.ticket.stats'
+    _description = 'Helpdesk Ticket Statistics'
+    _auto = False
+    _log_access = False
+
+    site_id = fields.Many2one('helpdesk.site', string='Site', readonly=True)
+    team_department_id = fields.Many2one('helpdesk.team.department', string='Department', readonly=True)
+    request_category_id = fields.Many2one('helpdesk.category', string='Category', readonly=True)
+    request_subcategory_id = fields.Many2one('helpdesk.subcategory', string='Subcategory', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Customer', readonly=True)
+    user_id = fields.Many2one('res.users', string='Assigned To', readonly=True)
+    stage_fold = fields.Boolean(string='Folded Stage', readonly=True)
+    status = fields.Char(string='Status', readonly=True)
+    ticket_count = fields.Integer(string='Ticket Count', readonly=True)
+
+    def _key_columns_sql(self):
+        return ', '.join(f'COALESCE({column}, 0)' for column in STATS_DIMENSIONS) + ", stage_fold, COALESCE(status, '')"
+
+    def init(self):
+        cr = self.env.cr
+        cr.execute("SELECT to_regclass(%s)", (self._table,))
+        if cr.fetchone()[0]:
+            return
+        cr.execute(f"""
+            CREATE TABLE "{self._table}" (
+                id SERIAL PRIMARY KEY,
+                {', '.join(f'{column} INTEGER' for column in STATS_DIMENSIONS)},
+                stage_fold BOOLEAN NOT NULL DEFAULT FALSE,
+                status VARCHAR,
+                ticket_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        cr.execute(f"""
+            CREATE UNIQUE INDEX "{self._table}_key_uniq"
+                ON "{self._table}" ({self._key_columns_sql()})
+        """)
+        for column in ('site_id', 'team_department_id', 'partner_id', 'user_id'):
+            cr.execute(f'CREATE INDEX "{self._table}_{column}_index" ON "{self._table}" ({column})')
+        self._rebuild()
+
+    def _key_order_sql(self, alias):
+        """ORDER BY clause of rows of alias in the order of ``_sort_key()``"""
+        return ', '.join(f'COALESCE({alias}.{column}, 0)' for column in STATS_DIMENSIONS) + \
+            f", {alias}.stage_fold, COALESCE({alias}.status, '') COLLATE \"C\""
+
+    def _key_match_sql(self, left, right):
+        """SQL condition matching rows of two aliases on the rollup key"""
+        return ' AND '.join(
+            [f'COALESCE({left}.{column}, 0) = COALESCE({right}.{column}, 0)' for column in STATS_DIMENSIONS]
+            + [f'{left}.stage_fold = {right}.stage_fold', f"COALESCE({left}.status, '') = COALESCE({right}.status, '')"]
+        )
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole rollup from helpdesk_ticket, touching only the rows that differ.
+
+        Rows are locked in key order, like the deltas of ``_apply_deltas()``, and the
+        table is never truncated: readers are not blocked, and a delta committed after
+        this transaction's snapshot makes it fail with a serialization error (and be
+        retried) instead of being overwritten.
+        """
+        self.env['helpdesk.ticket'].flush_model(list(STATS_TICKET_FIELDS))
+        self.env['helpdesk.stage'].flush_model(['fold'])
+        # Agent counters first, in the lock order of _apply_deltas()
+        self.env['helpdesk.agent.load']._rebuild()
+        cr = self.env.cr
+        columns = f"{', '.join(STATS_DIMENSIONS)}, stage_fold, status"
+        cr.execute("DROP TABLE IF EXISTS helpdesk_ticket_stats_truth")
+        cr.execute(f"""
+            CREATE TEMPORARY TABLE helpdesk_ticket_stats_truth ON COMMIT DROP AS
+            SELECT {', '.join(f't.{column}' for column in STATS_DIMENSIONS)},
+                   COALESCE(s.fold, FALSE) AS stage_fold, t.status, COUNT(*)::int AS ticket_count
+              FROM helpdesk_ticket t
+         LEFT JOIN helpdesk_stage s ON s.id = t.stage_id
+             WHERE t.active
+          GROUP BY {', '.join(f't.{column}' for column in STATS_DIMENSIONS)}, COALESCE(s.fold, FALSE), t.status
+        """)
+        # Lock the rows to change or delete, in key order
+        cr.execute(f"""
+            SELECT r.id
+              FROM "{self._table}" r
+         LEFT JOIN helpdesk_ticket_stats_truth v ON {self._key_match_sql('r', 'v')}
+             WHERE v.ticket_count IS DISTINCT FROM r.ticket_count
+          ORDER BY {self._key_order_sql('r')}
+               FOR UPDATE OF r
+        """)
+        cr.execute(f"""
+            DELETE FROM "{self._table}" r
+             WHERE NOT EXISTS (SELECT 1 FROM helpdesk_ticket_stats_truth v WHERE {self._key_match_sql('r', 'v')})
+        """)
+        deleted = cr.rowcount
+        cr.execute(f"""
+            INSERT INTO "{self._table}" ({columns}, ticket_count)
+            SELECT {columns}, ticket_count FROM helpdesk_ticket_stats_truth v
+          ORDER BY {self._key_order_sql('v')}
+            ON CONFLICT ({self._key_columns_sql()})
+            DO UPDATE SET ticket_count = EXCLUDED.ticket_count
+                    WHERE "{self._table}".ticket_count <> EXCLUDED.ticket_count
+        """)
+        _logger.info("Rebuilt %s: %s rows upserted, %s deleted", self._table, cr.rowcount, deleted)
+        cr.execute("DROP TABLE helpdesk_ticket_stats_truth")
+        self.invalidate_model()
+
+    @api.model
+    def _move_stage_fold(self, stage_ids, fold):
+        """Move the tickets of stages whose fold flag just became ``fold`` to the
+        matching stage_fold bucket, as deltas read in one grouped query"""
+        if not stage_ids:
+            return
+        self.env['helpdesk.ticket'].flush_model(list(STATS_TICKET_FIELDS))
+        self.env.cr.execute(f"""
+            SELECT {', '.join(STATS_DIMENSIONS)}, status, COUNT(*)
+              FROM helpdesk_ticket
+             WHERE active AND stage_id IN %s
+          GROUP BY {', '.join(STATS_DIMENSIONS)}, status
+        """, (tuple(stage_ids),))
+        before, after = Counter(), Counter()
+        for *dimensions, status, count in self.env.cr.fetchall():
+            before[(*dimensions, not fold, status)] += count
+            after[(*dimensions, fold, status)] += count
+        self._apply_deltas(before, after)
+
+    @api.model
+    def _ticket_keys(self, ticket_ids):
+        """Return a Counter of rollup keys for the given (active) tickets, read in one query"""
+        if not ticket_ids:
+            return Counter()
+        tickets = self.env['helpdesk.ticket'].browse(ticket_ids)
+        tickets.flush_recordset(list(STATS_TICKET_FIELDS))
+        self.env['helpdesk.stage'].flush_model(['fold'])
+        self.env.cr.execute(f"""
+            SELECT {', '.join(f't.{column}' for column in STATS_DIMENSIONS)},
+                   COALESCE(s.fold, FALSE), t.status, COUNT(*)
+              FROM helpdesk_ticket t
+         LEFT JOIN helpdesk_stage s ON s.id = t.stage_id
+             WHERE t.id IN %s AND t.active
+          GROUP BY {', '.join(f't.{column}' for column in STATS_DIMENSIONS)}, COALESCE(s.fold, FALSE), t.status
+        """, (tuple(ticket_ids),))
+        return Counter({tuple(row[:-1]): row[-1] for row in self.env.cr.fetchall()})
+
+    @api.model
+    def _apply_deltas(self, before, after):
+        """Move tickets counted under the ``before`` keys to the ``after`` keys with one upsert"""
+        deltas = Counter(after)
+        deltas.subtract(before)
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # Agent counters are always locked before rollup rows: create() locks them
+        # in _assign_agents() before its tickets reach the rollup
+        self.env['helpdesk.agent.load']._apply_stats_deltas(deltas)
+        # Upsert in the order of the unique index so that concurrent deltas lock rows alike
+        keys = sorted(deltas, key=_sort_key)
+        columns = list(zip(*keys))
+        self.env.cr.execute(f"""
+            INSERT INTO "{self._table}" ({', '.join(STATS_DIMENSIONS)}, stage_fold, status, ticket_count)
+            SELECT {', '.join(STATS_DIMENSIONS)}, stage_fold, status, ticket_count
+              FROM unnest({', '.join(['%s::int[]'] * len(STATS_DIMENSIONS))}, %s::bool[], %s::varchar[], %s::int[])
+                   WITH ORDINALITY AS v({', '.join(STATS_DIMENSIONS)}, stage_fold, status, ticket_count, position)
+          ORDER BY position
+            ON CONFLICT ({self._key_columns_sql()})
+            DO UPDATE SET ticket_count = "{self._table}".ticket_count + EXCLUDED.ticket_count
+         RETURNING id, ticket_count
+        """, (*[list(column) for column in columns], [deltas[key] for key in keys]))
+        # Rows of keys without tickets left are pruned
+        empty_ids = [row_id for row_id, count in self.env.cr.fetchall() if count <= 0]
+        if empty_ids:
+            self.env.cr.execute(f'DELETE FROM "{self._table}" WHERE id IN %s', (tuple(empty_ids),))
+        self.invalidate_model()
+
+    @api.model
+    def _count_by(self, field_name, ids, extra_groupby=None):
+        """Return [(record_id, [extra_value,] count)] summed from the rollup"""
+        groupby = [field_name, extra_groupby] if extra_groupby else [field_name]
+        return [
+            (*(key.id if isinstance(key, models.BaseModel) else key for key in keys), count)
+            for *keys, count in self.sudo()._read_group(
+                [(field_name, 'in', ids)], groupby, ['ticket_count:sum'],
+            )
+        ]
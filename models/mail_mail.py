@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from odoo import models, fields
+
+
+class MailMail(models.Model):
+    _inherit = 'mail.mail'
+    
+    # Number of delivery attempts of a department notification before it is reported as failed
+    _department_notification_max_attempts = 3
+    
+    department_notification_ticket_id = fields.Many2one(
+        'helpdesk.ticket',
+        string='Department Notification Ticket',
+        index='btree_not_null',
+        ondelete='set null',
+        help='Ticket whose department notification this email delivers',
+    )
+    department_notification_attempts = fields.Integer(string='Delivery Attempts', default=0)
+    
+    def _postprocess_sent_message(self, success_pids, failure_reason=False, failure_type=None):
+        notifications = self.filtered('department_notification_ticket_id')
+        tickets = notifications.department_notification_ticket_id
+        failed = notifications.filtered(lambda mail: mail.state == 'exception')
+        if failed:
+            self._retry_department_notifications(failed, failure_type)
+        result = super(MailMail, self)._postprocess_sent_message(
+            success_pids, failure_reason=failure_reason, failure_type=failure_type)
+        if tickets:
+            tickets.sudo()._update_department_notification_state()
+        return result
+    
+    def _retry_department_notifications(self, notifications, failure_type):
+        """Put failed department notifications back in the queue with a growing delay"""
+        now = fields.Datetime.now()
+        for mail in notifications:
+            attempts = mail.department_notification_attempts + 1
+            values = {'department_notification_attempts': attempts}
+            if attempts < self._department_notification_max_attempts:
+                values.update({
+                    'state': 'outgoing',
+                    'scheduled_date': now + timedelta(minutes=5 * attempts),
+                })
+            mail.write(values)
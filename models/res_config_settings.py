@@ -12,6 +12,13 @@ class ResConfigSettings(models.TransientModel):
         help='Genesys Cloud environment domain (e.g., mypurecloud.com, mypurecloud.ie, mypurecloud.de)'
     )
     
+    audit_deferred = fields.Boolean(
+        string='Deferred Audit Trail',
+        config_parameter='helpdesk.audit_deferred',
+        help='Stage audit trail entries and let a scheduled action write them to the audit log. '
+             'Use under peak load to keep audit writes out of user requests.'
+    )
+    
     # Microsoft Graph API Configuration
     ms_graph_tenant_id = fields.Char(
         string='Microsoft Tenant ID',
@@ -37,3 +44,11 @@ class ResConfigSettings(models.TransientModel):
         default='osoolcare@osoolre.com',
         help='Email address of the calendar where lift booking events will be created'
     )
+    
+    def set_values(self):
+        super(ResConfigSettings, self).set_values()
+        # The audit queue cron only runs in deferred mode; it turns itself off once
+        # the queue is drained after the mode is disabled
+        cron = self.env.ref('osool_helpdesk.ir_cron_helpdesk_audit_queue', raise_if_not_found=False)
+        if cron and self.audit_deferred and not cron.active:
+            cron.sudo().active = True
@@ -20,10 +20,9 @@ class ResPartner(models.Model):
     ticket_count = fields.Integer(string='Ticket Count', compute='_compute_ticket_count')
     
     def _compute_ticket_count(self):
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('partner_id', self)
         for partner in self:
-            partner.ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('partner_id', '=', partner.id)
-            ])
+            partner.ticket_count = counts.get(partner.id, 0)
     
     def action_view_tickets(self):
         """View tickets for this partner"""
@@ -219,17 +219,15 @@ class ResPartner(models.Model):
 
     def _compute_helpdesk_ticket_count(self):
         """Count helpdesk tickets for this tenant"""
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('partner_id', self)
         for record in self:
-            record.helpdesk_ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('partner_id', '=', record.id)
-            ])
+            record.helpdesk_ticket_count = counts.get(record.id, 0)
     
     def _compute_ticket_count(self):
         """Count tickets for compatibility with existing code"""
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('partner_id', self)
         for record in self:
-            record.ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('partner_id', '=', record.id)
-            ])
+            record.ticket_count = counts.get(record.id, 0)
 
     # ==========================================
     # Constraints & Validation
@@ -349,7 +347,11 @@ class ResPartner(models.Model):
         if vals.get('phone_primary'):
             vals['phone'] = vals['phone_primary']
             
-        return super().write(vals)
+        result = super().write(vals)
+        # The email of a user's partner is used to resolve Genesys agents
+        if 'email' in vals and self.sudo().user_ids:
+            self.env.registry.clear_cache()
+        return result
 
     # ==========================================
     # Display Name
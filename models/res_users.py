@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields
+from collections import defaultdict
+
+from odoo import models, fields, api, tools
+from odoo.tools import create_index
 
 
 class ResUsers(models.Model):
@@ -10,17 +13,88 @@ class ResUsers(models.Model):
     helpdesk_team_ids = fields.Many2many('helpdesk.team', string='Helpdesk Teams')
     max_tickets = fields.Integer(string='Max Concurrent Tickets', default=10)
     
+    # Ticket rights of the user (see helpdesk.ticket._get_permission_context)
+    helpdesk_is_supervisor = fields.Boolean(compute='_compute_helpdesk_permissions')
+    helpdesk_is_portal = fields.Boolean(compute='_compute_helpdesk_permissions')
+    
+    # Changes to these fields can alter the agent email -> user resolution
+    _agent_resolution_fields = {'login', 'email', 'active', 'partner_id'}
+    
     # Statistics
     assigned_ticket_count = fields.Integer(string='Assigned Tickets', compute='_compute_ticket_stats')
     closed_ticket_count = fields.Integer(string='Closed Tickets', compute='_compute_ticket_stats')
     
     def _compute_ticket_stats(self):
+        counts = self.env['helpdesk.ticket']._grouped_ticket_counts('user_id', self, 'status')
+        assigned = defaultdict(int)
+        for (user_id, status), count in counts.items():
+            if status not in ('closed', 'cancelled'):
+                assigned[user_id] += count
         for user in self:
-            user.assigned_ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('user_id', '=', user.id),
-                ('status', 'not in', ['closed', 'cancelled'])
-            ])
-            user.closed_ticket_count = self.env['helpdesk.ticket'].search_count([
-                ('user_id', '=', user.id),
-                ('status', '=', 'closed')
-            ])
+            user.assigned_ticket_count = assigned[user.id]
+            user.closed_ticket_count = counts.get((user.id, 'closed'), 0)
+    
+    @api.depends('group_ids')
+    def _compute_helpdesk_permissions(self):
+        for user in self:
+            # Supervisors (Team Leader or Manager) can edit all tickets
+            user.helpdesk_is_supervisor = user.has_group('osool_helpdesk.group_helpdesk_manager') \
+                or user.has_group('osool_helpdesk.group_helpdesk_team_leader')
+            # Portal users can edit the tickets where they are the customer
+            user.helpdesk_is_portal = user.has_group('base.group_portal')
+    
+    def init(self):
+        super(ResUsers, self).init()
+        # Case-insensitive agent lookups (see _get_agent_user_id)
+        create_index(self.env.cr, 'res_users_lower_login_index', 'res_users', ['lower(login)'])
+        create_index(self.env.cr, 'res_partner_lower_email_index', 'res_partner', ['lower(email)'],
+                     where='email IS NOT NULL')
+    
+    @api.model_create_multi
+    def create(self, vals_list):
+        users = super(ResUsers, self).create(vals_list)
+        self.env.registry.clear_cache()
+        return users
+    
+    def write(self, vals):
+        result = super(ResUsers, self).write(vals)
+        if self._agent_resolution_fields.intersection(vals):
+            self.env.registry.clear_cache()
+        return result
+    
+    def unlink(self):
+        result = super(ResUsers, self).unlink()
+        self.env.registry.clear_cache()
+        return result
+    
+    @api.model
+    @tools.ormcache('email')
+    def _get_agent_user_id(self, email):
+        """Active user whose login, or else email, matches the normalized address.
+        Results are kept in the registry LRU cache, cleared on user changes.
+        """
+        self.env.cr.execute("""
+            SELECT u.id
+              FROM res_users u
+              JOIN res_partner p ON p.id = u.partner_id
+             WHERE u.active AND (lower(u.login) = %s OR lower(p.email) = %s)
+          ORDER BY lower(u.login) = %s DESC, u.id
+             LIMIT 1
+        """, (email, email, email))
+        row = self.env.cr.fetchone()
+        return row[0] if row else False
+    
+    @api.model
+    def _resolve_agent_emails(self, emails):
+        """Resolve a batch of agent emails; each distinct address is looked up once.
+        Returns a list of res.users records (empty when unmatched) aligned with emails.
+        """
+        Users = self.sudo()
+        user_ids = {}
+        result = []
+        for email in emails:
+            email = email.strip().lower() if email else False
+            if email and email not in user_ids:
+                user_ids[email] = self._get_agent_user_id(email)
+            result.append(Users.browse(user_ids[email]) if email and user_ids[email] else Users)
+        return result
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for Osool Helpdesk module
+Run with: python3 /opt/odoo19/custom-addons/osool_helpdesk/scripts/benchmark_helpdesk.py [benchmark ...]
+
+Every benchmark runs inside a transaction that is rolled back at the end,
+so it is safe to run against a copy of the production database.
+"""
+
+import sys
+import time
+import tracemalloc
+
+# Add Odoo to path
+sys.path.append('/opt/odoo19')
+
+import odoo
+from odoo import api, SUPERUSER_ID
+
+# Database connection
+DB_NAME = 'osool'
+
+BATCH_SIZES = [1, 10, 100, 500]
+
+
+def _measure(env, func):
+    """Run func and return (elapsed seconds, number of SQL queries)"""
+    env.flush_all()
+    queries_before = env.cr.sql_log_count
+    start = time.perf_counter()
+    func()
+    # Include the work done at commit time (pending writes, buffered audit rows, tracking)
+    env.cr.flush()
+    return time.perf_counter() - start, env.cr.sql_log_count - queries_before
+
+
+def bench_create(env):
+    """Ticket creation: query count must stay flat as the batch grows"""
+    Ticket = env['helpdesk.ticket']
+    agent_login = env.user.login
+    print("Batch size | Queries | Queries/ticket | Seconds")
+    for size in BATCH_SIZES:
+        vals_list = [{
+            'name': f'Benchmark conversation {i}',
+            'source': 'genesys',
+            'agent_email': agent_login.upper() if i % 2 else agent_login,
+            'conversation_id': f'bench-{size}-{i}',
+        } for i in range(size)]
+        elapsed, queries = _measure(env, lambda: Ticket.create(vals_list))
+        print(f"{size:>10} | {queries:>7} | {queries / size:>14.2f} | {elapsed:.3f}")
+
+
+def bench_mass_edit(env):
+    """Mass edit of existing tickets: audit rows are flushed as one insert per write"""
+    Ticket = env['helpdesk.ticket']
+    Audit = env['helpdesk.audit']
+    print("Tickets | Fields | Audit rows | Queries | Seconds")
+    for size in [100, 500, 2000]:
+        tickets = Ticket.search([], limit=size)
+        if len(tickets) < size:
+            tickets |= Ticket.create([{'name': f'Benchmark ticket {i}'} for i in range(size - len(tickets))])
+        vals = {
+            'ticket_building': f'B-{size}',
+            'ticket_floor': f'F-{size}',
+            'ticket_phone': f'+9665{size:08d}',
+        }
+        audit_before = Audit.search_count([])
+        elapsed, queries = _measure(env, lambda: tickets.write(vals))
+        audit_rows = Audit.search_count([]) - audit_before
+        print(f"{size:>7} | {len(vals):>6} | {audit_rows:>10} | {queries:>7} | {elapsed:.3f}")
+
+
+def _clone_tickets(env, target):
+    """Duplicate existing ticket rows in SQL until the table holds target rows"""
+    cr = env.cr
+    cr.execute("SELECT COUNT(*) FROM helpdesk_ticket")
+    count = cr.fetchone()[0]
+    if not count or count >= target:
+        return
+    cr.execute("""
+        SELECT string_agg(quote_ident(column_name), ', ')
+          FROM information_schema.columns
+         WHERE table_name = 'helpdesk_ticket' AND column_name != 'id'
+    """)
+    columns = cr.fetchone()[0]
+    copies = -(-target // count) - 1
+    cr.execute(f"""
+        INSERT INTO helpdesk_ticket ({columns})
+        SELECT {columns} FROM helpdesk_ticket, generate_series(1, %s)
+    """, (copies,))
+
+
+def bench_export(env):
+    """Raw Data Export of 500k tickets: time and peak Python memory"""
+    from odoo.addons.osool_helpdesk.controllers.main import HelpdeskController
+    _clone_tickets(env, 500000)
+    controller = HelpdeskController()
+    print("Format | Rows | Bytes | Peak MiB | Seconds")
+    for file_format, writer in [('csv', controller._stream_csv), ('xlsx', controller._stream_xlsx)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = [0]
+
+        def counted():
+            for row in env['helpdesk.ticket']._raw_export_rows([]):
+                rows[0] += 1
+                yield row
+
+        size = sum(len(chunk) for chunk in writer(counted()))
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+        print(f"{file_format:>6} | {rows[0] - 1:>4} | {size:>5} | {peak:>8.1f} | {elapsed:.3f}")
+
+
+# Department notification body as it was rendered before the QWeb template:
+# one translated %-format string per ticket
+LEGACY_NOTIFICATION_BODY = '''
+    <div style="font-family: Arial, sans-serif; font-size: 14px;">
+        <h3 style="color: #875A7B;">New Ticket Assigned to: %s</h3>
+        <table style="width: 100%%; border-collapse: collapse; margin-top: 20px;">
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Ticket Number:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Subject:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Site:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Department:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Priority:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Category:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Subcategory:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Channel:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Name:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Phone:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Customer Email:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Building:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5;">Floor:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+            <tr>
+                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold; background-color: #f5f5f5; vertical-align: top;">Description:</td>
+                <td style="padding: 8px; border: 1px solid #ddd;">%s</td>
+            </tr>
+        </table>
+        <p style="margin-top: 20px;">
+            <a href="/web#id=%s&model=helpdesk.ticket&view_type=form"
+               style="background-color: #875A7B; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">
+                View Ticket
+            </a>
+        </p>
+        <p style="margin-top: 20px; color: #666; font-size: 12px;">
+            This is an automated notification from <strong>Osool Care</strong>.<br/>
+            Please do not reply to this email.
+        </p>
+    </div>
+'''
+
+
+def _legacy_notification_body(ticket):
+    priority_display = dict(ticket._fields['priority'].selection).get(ticket.priority, 'N/A')
+    channel_display = dict(ticket._fields['caller_source'].selection).get(ticket.caller_source, 'N/A') if ticket.caller_source else 'N/A'
+    return ticket.env._(LEGACY_NOTIFICATION_BODY) % (
+        ticket.team_department_id.name if ticket.team_department_id else 'N/A',
+        ticket.display_name or str(ticket.id),
+        ticket.name or 'N/A',
+        ticket.site_id.name if ticket.site_id else 'N/A',
+        ticket.team_department_id.name if ticket.team_department_id else 'N/A',
+        priority_display,
+        ticket.request_category_id.name if ticket.request_category_id else 'N/A',
+        ticket.request_subcategory_id.name if ticket.request_subcategory_id else 'N/A',
+        channel_display,
+        ticket.partner_id.name if ticket.partner_id else 'N/A',
+        ticket.partner_phone or ticket.ticket_phone or 'N/A',
+        ticket.partner_email or ticket.ticket_email or 'N/A',
+        ticket.ticket_building or 'N/A',
+        ticket.ticket_floor or 'N/A',
+        ticket.description or 'No description provided',
+        ticket.id,
+    )
+
+
+def bench_notification(env):
+    """Department notifications: body render before/after the QWeb template, then queue throughput.
+    Every size starts from tickets reset to "not notified", so no send is refused as
+    already queued or notified by a previous size.
+    """
+    Ticket = env['helpdesk.ticket']
+    sizes = [10, 100, 500]
+    tickets = Ticket.search([('team_department_id.notified_email_ids', '!=', False)], limit=max(sizes))
+    if not tickets:
+        print("No ticket with a notified department")
+        return
+    print("Tickets | Legacy render s | QWeb render s | Queue queries | Queue seconds | Tickets/s")
+    for size in sizes:
+        batch = tickets[:size]
+        batch.write({'department_notified': False, 'department_notification_state': False})
+
+        env.invalidate_all()
+        legacy, dummy = _measure(env, lambda: [_legacy_notification_body(ticket) for ticket in batch])
+        env.invalidate_all()
+        qweb, dummy = _measure(env, lambda: [ticket._render_department_notification_body() for ticket in batch])
+
+        def send():
+            for ticket in batch:
+                ticket.action_send_team_department_notification()
+
+        elapsed, queries = _measure(env, send)
+        print(f"{len(batch):>7} | {legacy:>15.3f} | {qweb:>13.3f} | {queries:>13} | {elapsed:>13.3f} | {len(batch) / elapsed:.1f}")
+
+
+def bench_intake(env):
+    """Conversation intake API: events per minute for batches from a fake Genesys feed"""
+    from fake_genesys_client import fake_conversations
+    Ticket = env['helpdesk.ticket']
+    print("Batch size | Events | Created | Queries | Seconds | Events/min")
+    for batch_size in [10, 100, 500]:
+        # 10% of the events repeat a conversation already sent and update its ticket
+        events = list(fake_conversations(5000, prefix=f'bench-intake-{batch_size}', agent_email=env.user.login))
+        created = [0]
+
+        def push():
+            for start in range(0, len(events), batch_size):
+                results = Ticket._intake_conversations(events[start:start + batch_size])
+                created[0] += sum(result['status'] == 'created' for result in results)
+
+        elapsed, queries = _measure(env, push)
+        print(f"{batch_size:>10} | {len(events):>6} | {created[0]:>7} | {queries:>7} | {elapsed:>7.3f} | {len(events) / elapsed * 60:.0f}")
+
+
+def bench_email_content(env):
+    """email_content cleanup on realistic 100KB-5MB bodies: chained replaces vs sanitizer"""
+    from urllib.parse import unquote
+    from odoo.addons.osool_helpdesk.tools import sanitize_email_content
+
+    def chained(content):
+        content = unquote(content)
+        content = content.replace('"', '').replace('*', '').replace('_', '').replace('~', '')
+        content = content.replace('`', '').replace('=', '').replace('+', '').replace('-', '')
+        return content.replace('\r\n', '<br/>').replace('\n', '<br/>')
+
+    paragraph = (
+        'Dear Osool Care team,\r\nThe *east-side* lift_2 on floor 14 stopped again ~ "urgent" = yes + please call.\r\n'
+        '%D9%85%D8%B1%D8%AD%D8%A8%D8%A7 %E2%80%94 '
+        '<p style="margin-top: 10px; font-family: Arial">See https://osool.example.com/ticket?id=42&amp;ref=a%20b</p>\n'
+    )
+    print("Size KB | Implementation | Peak MiB | Seconds")
+    for size in [100 * 1024, 1024 * 1024, 5 * 1024 * 1024]:
+        content = paragraph * (size // len(paragraph))
+        for name, func in [('chained', chained), ('sanitizer', lambda c: sanitize_email_content(c, max_size=0))]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            func(content)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+            print(f"{size // 1024:>7} | {name:>14} | {peak:>8.1f} | {elapsed:.4f}")
+
+
+def bench_stage_change(env):
+    """Mass stage change (kanban drag of many cards): queries per ticket must stay flat"""
+    Ticket = env['helpdesk.ticket']
+    stage = env['helpdesk.stage'].search([('is_in_progress', '=', True)], limit=1)
+    if not stage:
+        print("No In Progress stage")
+        return
+    print("Tickets | Queries | Queries/ticket | Seconds")
+    for size in [10, 100, 500]:
+        tickets = Ticket.search([('stage_id', '!=', stage.id)], limit=size)
+        if not tickets:
+            break
+        elapsed, queries = _measure(env, lambda: tickets.write({'stage_id': stage.id}))
+        print(f"{len(tickets):>7} | {queries:>7} | {queries / len(tickets):>14.2f} | {elapsed:.3f}")
+
+
+def bench_permissions(env):
+    """Ticket list view as an agent: queries to read can_edit_ticket must not grow with the rows"""
+    agent = env['res.users'].search([
+        ('is_helpdesk_agent', '=', True), ('share', '=', False),
+    ], limit=1) or env.user
+    Ticket = env['helpdesk.ticket'].with_user(agent)
+    print("Rows | Queries | Seconds")
+    for size in [80, 500, 2000]:
+        ids = Ticket.sudo().search([], limit=size).ids
+        Ticket.env.invalidate_all()
+        elapsed, queries = _measure(env, lambda: Ticket.browse(ids).read(['name', 'status', 'user_id', 'can_edit_ticket']))
+        print(f"{len(ids):>4} | {queries:>7} | {elapsed:.3f}")
+
+
+BENCHMARKS = {
+    'create': bench_create,
+    'mass_edit': bench_mass_edit,
+    'export': bench_export,
+    'notification': bench_notification,
+    'intake': bench_intake,
+    'email_content': bench_email_content,
+    'permissions': bench_permissions,
+    'stage_change': bench_stage_change,
+}
+
+
+def run(names):
+    odoo.tools.config.parse_config(['-d', DB_NAME, '-c', '/etc/odoo19.conf'])
+
+    from odoo.modules.registry import Registry
+    registry = Registry.new(DB_NAME)
+    with registry.cursor() as cr:
+        env = api.Environment(cr, SUPERUSER_ID, {})
+        for name in names or BENCHMARKS:
+            print(f"\n== {name} ==")
+            BENCHMARKS[name](env)
+        cr.rollback()
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Fake Genesys client for the conversation intake API
+Run with: python3 fake_genesys_client.py URL API_KEY [events_per_minute] [batch_size] [minutes]
+      or: python3 fake_genesys_client.py URL API_KEY hammer [workers] [requests_per_worker]
+
+Pushes generated conversations to /helpdesk/api/conversations at a steady
+rate and reports the accepted throughput. About 10% of the events repeat a
+conversation already sent, like Genesys retries do.
+
+The hammer mode sends the same conversation from several threads at once;
+the server must end up with exactly one ticket for it.
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+QUEUES = ['Customer Care', 'Lift Booking', 'Security', 'Maintenance']
+CHANNELS = ['voice', 'whatsapp', 'chat']
+
+
+def fake_conversations(count, prefix=None, agent_email='agent@example.com', repeat_ratio=0.1):
+    """Yield count Genesys-like conversation payloads"""
+    prefix = prefix or uuid.uuid4().hex[:8]
+    sent = []
+    for index in range(count):
+        if sent and random.random() < repeat_ratio:
+            yield random.choice(sent)
+            continue
+        conversation = {
+            'conversation_id': f'{prefix}-{index}',
+            'conversation_type': 'call',
+            'queue_name': random.choice(QUEUES),
+            'agent_email': agent_email,
+            'agent_name': 'Fake Agent',
+            'caller_source': random.choice(CHANNELS),
+            'ticket_phone': f'+9665{random.randint(0, 99999999):08d}',
+            'email_content': 'Caller asked for an update on the request',
+        }
+        sent.append(conversation)
+        yield conversation
+
+
+def push(url, api_key, batch):
+    request = urllib.request.Request(url, data=json.dumps(batch).encode(), method='POST', headers={
+        'Content-Type': 'application/json',
+        'Authorization': f'Bearer {api_key}',
+    })
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)['results']
+
+
+def run(url, api_key, events_per_minute=3000, batch_size=50, minutes=1):
+    interval = 60.0 * batch_size / events_per_minute
+    events = fake_conversations(events_per_minute * minutes)
+    sent = created = 0
+    start = time.perf_counter()
+    while True:
+        batch = [event for _, event in zip(range(batch_size), events)]
+        if not batch:
+            break
+        tick = time.perf_counter()
+        results = push(url, api_key, batch)
+        sent += len(batch)
+        created += sum(result['status'] == 'created' for result in results)
+        time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+    elapsed = time.perf_counter() - start
+    print(f"Sent {sent} events ({created} created) in {elapsed:.1f}s: {sent / elapsed * 60:.0f} events/min")
+
+
+def hammer(url, api_key, workers=8, requests_per_worker=20):
+    conversation = next(fake_conversations(1))
+    ticket_ids = set()
+    errors = []
+
+    def worker():
+        for index in range(requests_per_worker):
+            try:
+                results = push(url, api_key, [dict(conversation, agent_name=f'Fake Agent {index}')])
+                ticket_ids.add(results[0]['ticket_id'])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{workers * requests_per_worker} requests for conversation {conversation['conversation_id']}: "
+          f"tickets {sorted(ticket_ids)}, {len(errors)} errors")
+    if len(ticket_ids) != 1 or errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit(__doc__)
+    if sys.argv[3:4] == ['hammer']:
+        hammer(sys.argv[1], sys.argv[2], *map(int, sys.argv[4:6]))
+    else:
+        run(sys.argv[1], sys.argv[2], *map(int, sys.argv[3:6]))
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+from . import test_ticket_counters
+from . import test_ticket_stats
+from . import test_raw_export
+from . import test_portal_tickets
+from . import test_intake_concurrency
+from . import test_business_hours
+from . import test_ticket_sla
+from . import test_ticket_routing
+from . import test_ticket_onchange
+from . import test_ticket_permissions
+from . import test_audit_buffer
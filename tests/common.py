@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import TransactionCase
+
+
+class HelpdeskCommon(TransactionCase):
+    """Routing records and users shared by the helpdesk tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.team = cls.env['helpdesk.team'].create({'name': 'Test Team'})
+        cls.department = cls.env['helpdesk.team.department'].create({'name': 'Test Department'})
+        cls.category = cls.env['helpdesk.category'].create({
+            'name': 'Test Category',
+            'code': 'TST',
+            'team_id': cls.team.id,
+            'team_department_id': cls.department.id,
+        })
+        cls.subcategory = cls.env['helpdesk.subcategory'].create({
+            'name': 'Test Subcategory',
+            'category_id': cls.category.id,
+        })
+        cls.partner = cls.env['res.partner'].create({'name': 'Test Customer', 'email': 'customer@example.com'})
+        cls.agent = cls.env['res.users'].create({
+            'name': 'Test Agent',
+            'login': 'test_helpdesk_agent',
+            'email': 'test_helpdesk_agent@example.com',
+            'is_helpdesk_agent': True,
+            'helpdesk_team_ids': [Command.set(cls.team.ids)],
+            'group_ids': [Command.link(cls.env.ref('osool_helpdesk.group_helpdesk_team_member').id)],
+        })
+
+    @classmethod
+    def _create_tickets(cls, count, **vals):
+        return cls.env['helpdesk.ticket'].create([
+            dict({'name': f'Test ticket {index}', 'partner_id': cls.partner.id}, **vals)
+            for index in range(count)
+        ])
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, get_db_name, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAuditBuffer(BaseCase):
+    """Buffered audit rows reach the audit log once the transaction commits,
+    directly or through the staging queue in deferred mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        self.ticket_ids = []
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            env['ir.config_parameter'].set_param('helpdesk.audit_deferred', False)
+            env['helpdesk.ticket'].browse(self.ticket_ids).exists().unlink()
+
+    def _create_committed_ticket(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            ticket = env['helpdesk.ticket'].create({'name': 'Audited ticket'})
+            ticket.write({'ticket_building': 'B-1'})
+            self.ticket_ids.append(ticket.id)
+            # Nothing is written before commit
+            cr.execute("SELECT COUNT(*) FROM helpdesk_audit WHERE ticket_id = %s", (ticket.id,))
+            self.assertEqual(cr.fetchone()[0], 0)
+        return ticket.id
+
+    def _count(self, table, ticket_id):
+        with self.registry.cursor() as cr:
+            cr.execute(f"SELECT COUNT(*) FROM {table} WHERE ticket_id = %s", (ticket_id,))
+            return cr.fetchone()[0]
+
+    def test_flush_on_commit(self):
+        ticket_id = self._create_committed_ticket()
+        self.assertGreaterEqual(self._count('helpdesk_audit', ticket_id), 2)
+        self.assertEqual(self._count('helpdesk_audit_queue', ticket_id), 0)
+
+    def test_deferred_drain(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            env['ir.config_parameter'].set_param('helpdesk.audit_deferred', True)
+        ticket_id = self._create_committed_ticket()
+        staged = self._count('helpdesk_audit_queue', ticket_id)
+        self.assertGreaterEqual(staged, 2)
+        self.assertEqual(self._count('helpdesk_audit', ticket_id), 0)
+
+        with self.registry.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['helpdesk.audit']._cron_drain_queue()
+        self.assertEqual(self._count('helpdesk_audit', ticket_id), staged)
+        self.assertEqual(self._count('helpdesk_audit_queue', ticket_id), 0)
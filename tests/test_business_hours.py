@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from odoo.tests import BaseCase, tagged
+
+from ..tools.business_hours import ContinuousCalendar, WorkingCalendar
+
+WEEKDAYS = range(5)
+EVERY_DAY = range(7)
+
+
+@tagged('post_install', '-at_install')
+class TestBusinessHours(BaseCase):
+    """Deadlines on working calendars; 2026-10-16 is a Friday"""
+
+    def test_weekend_rollover(self):
+        calendar = WorkingCalendar('UTC', 8, 17, WEEKDAYS, datetime(2026, 10, 16))
+        start = datetime(2026, 10, 16, 16, 0)
+        self.assertEqual(calendar.add_minutes(start, 120), datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(calendar.working_minutes(start, datetime(2026, 10, 19, 9, 0)), 120)
+        # A start during the weekend waits for Monday morning
+        self.assertEqual(calendar.add_minutes(datetime(2026, 10, 17, 12, 0), 30), datetime(2026, 10, 19, 8, 30))
+
+    def test_overnight_shift(self):
+        calendar = WorkingCalendar('UTC', 22, 6, EVERY_DAY, datetime(2026, 10, 19, 5, 0))
+        # Inside the shift that started the previous evening
+        start = datetime(2026, 10, 19, 5, 0)
+        self.assertEqual(calendar.add_minutes(start, 120), datetime(2026, 10, 19, 23, 0))
+        self.assertEqual(calendar.working_minutes(start, datetime(2026, 10, 20, 5, 0)), 8 * 60)
+
+    def test_overnight_shift_weekdays(self):
+        # The Friday night shift belongs to Friday and ends Saturday morning
+        calendar = WorkingCalendar('UTC', 22, 6, WEEKDAYS, datetime(2026, 10, 16))
+        start = datetime(2026, 10, 17, 5, 0)
+        self.assertEqual(calendar.add_minutes(start, 120), datetime(2026, 10, 19, 23, 0))
+
+    def test_24h_calendar(self):
+        calendar = WorkingCalendar('UTC', 0, 0, EVERY_DAY, datetime(2026, 10, 16))
+        start = datetime(2026, 10, 16, 13, 45)
+        self.assertEqual(calendar.add_minutes(start, 3000), start + timedelta(minutes=3000))
+        self.assertEqual(calendar.working_minutes(start, start + timedelta(days=40)), 40 * 24 * 60)
+
+    def test_holidays(self):
+        monday = (datetime(2026, 10, 19), datetime(2026, 10, 20))
+        calendar = WorkingCalendar('UTC', 8, 17, WEEKDAYS, datetime(2026, 10, 16), holidays=[monday])
+        start = datetime(2026, 10, 16, 16, 0)
+        self.assertEqual(calendar.add_minutes(start, 120), datetime(2026, 10, 20, 9, 0))
+        # A holiday ending mid-day leaves the rest of the day worked
+        afternoon = (datetime(2026, 10, 19), datetime(2026, 10, 19, 13, 0))
+        calendar = WorkingCalendar('UTC', 8, 17, WEEKDAYS, datetime(2026, 10, 16), holidays=[afternoon])
+        self.assertEqual(calendar.add_minutes(start, 120), datetime(2026, 10, 19, 14, 0))
+
+    def test_start_before_opening(self):
+        calendar = WorkingCalendar('UTC', 8, 17, WEEKDAYS, datetime(2026, 10, 19))
+        start = datetime(2026, 10, 19, 6, 0)
+        self.assertEqual(calendar.add_minutes(start, 60), datetime(2026, 10, 19, 9, 0))
+        self.assertEqual(calendar.working_minutes(start, datetime(2026, 10, 19, 8, 0)), 0)
+        # Working hours are local time: 08:00 in Riyadh is 05:00 UTC
+        calendar = WorkingCalendar('Asia/Riyadh', 8, 17, WEEKDAYS, datetime(2026, 10, 19))
+        self.assertEqual(calendar.add_minutes(datetime(2026, 10, 19, 4, 0), 60), datetime(2026, 10, 19, 6, 0))
+
+    def test_continuous_calendar(self):
+        calendar = ContinuousCalendar()
+        start = datetime(2026, 10, 17, 23, 0)
+        self.assertEqual(calendar.add_minutes(start, 90), datetime(2026, 10, 18, 0, 30))
+        self.assertEqual(calendar.working_minutes(start, datetime(2026, 10, 18, 0, 30)), 90)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import psycopg2
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, get_db_name, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestIntakeConcurrency(BaseCase):
+    """Two transactions receive the same conversation: the unique index on
+    conversation_id must leave one ticket, and the loser must be retried."""
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        self.conversation_id = 'test-intake-concurrency-%s' % id(self)
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            env['helpdesk.ticket'].search([('conversation_id', '=', self.conversation_id)]).unlink()
+
+    def test_same_conversation_from_two_cursors(self):
+        conversations = [{'conversation_id': self.conversation_id, 'queue_name': 'Concurrency Test'}]
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            env1 = api.Environment(cr1, SUPERUSER_ID, {})
+            env2 = api.Environment(cr2, SUPERUSER_ID, {})
+            # Both transactions take their snapshot before either one has created the ticket
+            cr1.execute("SELECT 1")
+            cr2.execute("SELECT 1")
+            [created] = env1['helpdesk.ticket']._intake_conversations(conversations)
+            self.assertEqual(created['status'], 'created')
+            cr1.commit()
+
+            with self.assertRaises(psycopg2.errors.SerializationFailure):
+                env2['helpdesk.ticket']._intake_conversations(conversations)
+            # What the request retry does: start over in a new transaction
+            cr2.rollback()
+            env2.invalidate_all()
+            [retried] = env2['helpdesk.ticket']._intake_conversations(conversations)
+            cr2.commit()
+
+        self.assertEqual(retried['status'], 'updated')
+        self.assertEqual(retried['ticket_id'], created['ticket_id'])
+        with self.registry.cursor() as cr:
+            cr.execute("SELECT COUNT(*) FROM helpdesk_ticket WHERE conversation_id = %s", (self.conversation_id,))
+            self.assertEqual(cr.fetchone()[0], 1)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import uuid
+
+import psycopg2
+
+from odoo import api, SUPERUSER_ID
+from odoo.modules.registry import Registry
+from odoo.tests import BaseCase, get_db_name, tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestPortalTickets(HelpdeskCommon):
+
+    def test_keyset_pages(self):
+        tickets = self._create_tickets(5)
+        domain = [('partner_id', '=', self.partner.id)]
+        Ticket = self.env['helpdesk.ticket']
+        page, next_cursor, prev_cursor = Ticket._portal_ticket_page(domain, sortby='name', limit=2)
+        self.assertEqual(len(page), 2)
+        self.assertFalse(prev_cursor)
+        page2, next_cursor2, prev_cursor2 = Ticket._portal_ticket_page(domain, sortby='name', after=next_cursor, limit=2)
+        self.assertFalse(page & page2)
+        self.assertEqual(prev_cursor2, page2[0].id)
+        back, dummy, dummy = Ticket._portal_ticket_page(domain, sortby='name', before=prev_cursor2, limit=2)
+        self.assertEqual(back, page)
+        self.assertLessEqual(page | page2, tickets)
+
+    def test_foreign_cursor_ignored(self):
+        self._create_tickets(3)
+        other_partner = self.env['res.partner'].create({'name': 'Other Customer'})
+        foreign = self._create_tickets(1, partner_id=other_partner.id)
+        domain = [('partner_id', '=', self.partner.id)]
+        Ticket = self.env['helpdesk.ticket']
+        first_page = Ticket._portal_ticket_page(domain, limit=2)
+        self.assertEqual(Ticket._portal_ticket_page(domain, after=foreign.id, limit=2), first_page)
+        self.assertEqual(Ticket._portal_ticket_page(domain, before=foreign.id, limit=2), first_page)
+
+
+@tagged('post_install', '-at_install')
+class TestPortalSubmissionConcurrency(BaseCase):
+    """Two requests submit the same portal form: the unique index on the token
+    must leave one ticket, and the loser must be retried onto it."""
+
+    def setUp(self):
+        super().setUp()
+        self.registry = Registry(get_db_name())
+        self.token = uuid.uuid4().hex
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            self.partner_id = env['res.partner'].create({'name': 'Concurrent Customer'}).id
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with self.registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {'active_test': False})
+            env['helpdesk.ticket'].search([('portal_submission_token', '=', self.token)]).unlink()
+            env['res.partner'].browse(self.partner_id).unlink()
+
+    def _submit(self, env):
+        """What the portal submit route does once the form is valid; returns the redirect target"""
+        Ticket = env['helpdesk.ticket']
+        partner = env['res.partner'].browse(self.partner_id)
+        ticket = Ticket._portal_submission_ticket(partner, self.token)
+        if not ticket:
+            ticket = Ticket._create_portal_submission({
+                'name': 'Concurrent submission',
+                'partner_id': partner.id,
+                'caller_source': 'selfservice',
+                'portal_submission_token': self.token,
+            })
+        return f"/my/ticket/{ticket.id}"
+
+    def test_same_token_from_two_cursors(self):
+        with self.registry.cursor() as cr1, self.registry.cursor() as cr2:
+            env1 = api.Environment(cr1, SUPERUSER_ID, {})
+            env2 = api.Environment(cr2, SUPERUSER_ID, {})
+            # Both transactions take their snapshot before either one has created the ticket
+            cr1.execute("SELECT 1")
+            cr2.execute("SELECT 1")
+            first = self._submit(env1)
+            cr1.commit()
+
+            with self.assertRaises(psycopg2.errors.SerializationFailure):
+                self._submit(env2)
+            # What the request retry does: start over in a new transaction
+            cr2.rollback()
+            env2.invalidate_all()
+            second = self._submit(env2)
+            cr2.commit()
+
+        self.assertEqual(second, first)
+        with self.registry.cursor() as cr:
+            cr.execute("SELECT COUNT(*) FROM helpdesk_ticket WHERE portal_submission_token = %s", (self.token,))
+            self.assertEqual(cr.fetchone()[0], 1)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestRawExport(HelpdeskCommon):
+
+    def _export_domain(self, records, active_domain):
+        action = records.with_context(active_domain=active_domain).action_export_raw_records('csv')
+        return json.loads(parse_qs(urlsplit(action['url']).query)['domain'][0])
+
+    def test_export_selected_records(self):
+        tickets = self._create_tickets(3, team_department_id=self.department.id)
+        active_domain = [('team_department_id', '=', self.department.id)]
+        self.assertEqual(self._export_domain(tickets[:2], active_domain), [['id', 'in', tickets[:2].ids]])
+
+    def test_export_whole_domain(self):
+        tickets = self._create_tickets(3, team_department_id=self.department.id)
+        active_domain = [('team_department_id', '=', self.department.id)]
+        self.assertEqual(self._export_domain(tickets, active_domain), [['team_department_id', '=', self.department.id]])
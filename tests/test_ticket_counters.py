@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketCounters(HelpdeskCommon):
+    """Smart button and kanban counters cost the same number of queries for 1 or 20 records"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sites = cls.env['helpdesk.site'].create([{'name': f'Site {index}'} for index in range(20)])
+        cls.departments = cls.env['helpdesk.team.department'].create([
+            {'name': f'Department {index}', 'site_ids': [Command.set(cls.sites.ids)]} for index in range(20)
+        ])
+        cls.categories = cls.env['helpdesk.category'].create([
+            {'name': f'Category {index}', 'code': f'C{index}'} for index in range(20)
+        ])
+        cls.subcategories = cls.env['helpdesk.subcategory'].create([
+            {'name': f'Subcategory {index}', 'category_id': category.id}
+            for index, category in enumerate(cls.categories)
+        ])
+        cls.partners = cls.env['res.partner'].create([{'name': f'Customer {index}'} for index in range(20)])
+        cls.users = cls.env['res.users'].create([
+            {'name': f'Agent {index}', 'login': f'test_counter_agent_{index}'} for index in range(20)
+        ])
+        cls.env['helpdesk.ticket'].create([{
+            'name': f'Counter ticket {index}',
+            'site_id': cls.sites[index % 20].id,
+            'team_department_id': cls.departments[index % 20].id,
+            'request_category_id': cls.categories[index % 20].id,
+            'request_subcategory_id': cls.subcategories[index % 20].id,
+            'partner_id': cls.partners[index % 20].id,
+        } for index in range(60)])
+
+    def assertFlatQueryCount(self, records, field_names):
+        """Reading field_names on 5 and 20 records takes no more queries than on 1"""
+        self.env.invalidate_all()
+        self.env.flush_all()
+        queries_before = self.cr.sql_log_count
+        records[:1].with_prefetch().read(field_names)
+        baseline = self.cr.sql_log_count - queries_before
+        for size in (5, 20):
+            self.env.invalidate_all()
+            with self.assertQueryCount(baseline):
+                values = records[:size].with_prefetch().read(field_names)
+            self.assertEqual(len(values), size)
+
+    def test_site_counters(self):
+        self.assertFlatQueryCount(self.sites, ['ticket_count', 'open_ticket_count', 'closed_ticket_count'])
+        self.assertEqual(sum(self.sites.mapped('ticket_count')), 60)
+
+    def test_department_counters(self):
+        self.assertFlatQueryCount(self.departments, ['ticket_count', 'open_ticket_count', 'closed_ticket_count'])
+        self.assertEqual(self.departments[0].ticket_count, 3)
+
+    def test_category_counters(self):
+        self.assertFlatQueryCount(self.categories, ['ticket_count'])
+        self.assertFlatQueryCount(self.subcategories, ['ticket_count'])
+        self.assertEqual(self.subcategories[0].ticket_count, 3)
+
+    def test_partner_and_user_counters(self):
+        self.assertFlatQueryCount(self.partners, ['ticket_count'])
+        self.assertFlatQueryCount(self.users, ['assigned_ticket_count', 'closed_ticket_count'])
+        self.assertEqual(self.partners[0].ticket_count, 3)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketOnchange(HelpdeskCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.owner = cls.env['res.users'].create({'name': 'Test Category Owner', 'login': 'test_helpdesk_category_owner'})
+        cls.category.write({'form_type': 'complaint', 'ticket_owner_id': cls.owner.id})
+        cls.other_department = cls.env['helpdesk.team.department'].create({'name': 'Other Test Department'})
+
+    def test_category_onchange(self):
+        ticket = self.env['helpdesk.ticket'].new({
+            'request_category_id': self.category.id,
+            'request_subcategory_id': self.subcategory.id,
+        })
+        ticket._onchange_request_category_id()
+        self.assertEqual(ticket.form_type, 'complaint')
+        self.assertEqual(ticket.team_department_id, self.department)
+        self.assertEqual(ticket.team_id, self.team)
+        self.assertFalse(ticket.request_subcategory_id)
+        self.assertFalse(ticket.ticket_owner_id, "The category onchange does not set the Ticket Owner")
+
+    def test_subcategory_onchange(self):
+        other_team = self.env['helpdesk.team'].create({'name': 'Other Test Team'})
+        ticket = self.env['helpdesk.ticket'].new({
+            'request_category_id': self.category.id,
+            'request_subcategory_id': self.subcategory.id,
+            'team_department_id': self.other_department.id,
+            'form_type': 'marketing',
+            'team_id': other_team.id,
+        })
+        ticket._onchange_subcategory()
+        # The subcategory has no team or SLA of its own: only the owner and priority follow
+        self.assertEqual(ticket.team_department_id, self.other_department)
+        self.assertEqual(ticket.form_type, 'marketing')
+        self.assertEqual(ticket.team_id, other_team)
+        self.assertEqual(ticket.ticket_owner_id, self.owner)
+        self.assertEqual(ticket.priority, '0')
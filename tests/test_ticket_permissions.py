@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketPermissions(HelpdeskCommon):
+
+    def test_permission_context_once_per_transaction(self):
+        Ticket = self.env['helpdesk.ticket'].with_user(self.agent)
+        permissions = Ticket._get_permission_context()
+        self.assertFalse(permissions.is_supervisor)
+        self.assertFalse(permissions.is_portal)
+        with self.assertQueryCount(0):
+            for dummy in range(3):
+                Ticket._get_permission_context()
+
+    def test_list_view_query_count(self):
+        """Reading can_edit_ticket on a list costs the same number of queries for 1 or 20 rows"""
+        # The agent gets the first max_tickets tickets of the team, the creator the rest
+        tickets = self._create_tickets(20, team_id=self.team.id).with_user(self.agent)
+        field_names = ['name', 'status', 'user_id', 'can_edit_ticket']
+        self.env.flush_all()
+        # Warm up the registry caches (groups, access rights, record rules)
+        tickets[:1].read(field_names)
+        self.env.invalidate_all()
+        queries_before = self.cr.sql_log_count
+        tickets[:1].with_prefetch().read(field_names)
+        baseline = self.cr.sql_log_count - queries_before
+        for size in (5, 20):
+            self.env.invalidate_all()
+            with self.assertQueryCount(baseline):
+                values = tickets[:size].with_prefetch().read(field_names)
+            self.assertEqual(len(values), size)
+        owned = tickets.filtered(lambda ticket: ticket.user_id == self.agent)
+        self.assertTrue(owned)
+        self.assertTrue(all(owned.mapped('can_edit_ticket')))
+        self.assertFalse(any((tickets - owned).mapped('can_edit_ticket')))
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketRouting(HelpdeskCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.other_team = cls.env['helpdesk.team'].create({'name': 'Other Test Team'})
+        cls.other_agent = cls.env['res.users'].create({
+            'name': 'Other Test Agent',
+            'login': 'test_helpdesk_other_agent',
+            'email': 'test_helpdesk_other_agent@example.com',
+            'is_helpdesk_agent': True,
+            'max_tickets': 1,
+            'helpdesk_team_ids': [Command.set(cls.other_team.ids)],
+            'group_ids': [Command.link(cls.env.ref('osool_helpdesk.group_helpdesk_team_member').id)],
+        })
+
+    def test_owner_is_creator_and_assignee_is_routed(self):
+        [ticket] = self._create_tickets(1, request_category_id=self.category.id)
+        self.assertEqual(ticket.ticket_owner_id, self.env.user)
+        self.assertEqual(ticket.user_id, self.agent)
+
+    def test_agent_email(self):
+        [ticket] = self._create_tickets(1, request_category_id=self.category.id, agent_email=self.other_agent.login)
+        self.assertEqual(ticket.ticket_owner_id, self.other_agent)
+        self.assertEqual(ticket.user_id, self.other_agent)
+
+    def test_ticket_team_before_category_team(self):
+        [ticket] = self._create_tickets(1, request_category_id=self.category.id, team_id=self.other_team.id)
+        self.assertEqual(ticket.team_id, self.other_team)
+        self.assertEqual(ticket.user_id, self.other_agent)
+
+    def test_max_tickets(self):
+        first, second = self._create_tickets(2, team_id=self.other_team.id)
+        self.assertEqual(first.user_id, self.other_agent)
+        # No agent of the team has room left: the Ticket Owner keeps the ticket
+        self.assertEqual(second.user_id, self.env.user)
+        self.assertEqual(self.env['helpdesk.agent.load'].search([('user_id', '=', self.other_agent.id)]).open_count, 1)
+
+    @contextmanager
+    def _record_lock_order(self):
+        """Yield the agent load and rollup tables in the order the block first locks their rows"""
+        tables = []
+        execute = self.env.cr.execute
+
+        def record(query, *args, **kwargs):
+            sql = str(query)
+            if sql.lstrip().startswith(('INSERT', 'UPDATE', 'DELETE')) or 'FOR UPDATE' in sql:
+                for table in ('helpdesk_agent_load', 'helpdesk_ticket_stats'):
+                    if f'"{table}"' in sql and table not in tables:
+                        tables.append(table)
+            return execute(query, *args, **kwargs)
+
+        with patch.object(self.env.cr, 'execute', record):
+            yield tables
+            self.env.flush_all()
+
+    def test_lock_order(self):
+        """create() and write() lock agent counters before rollup rows, so they cannot deadlock"""
+        expected = ['helpdesk_agent_load', 'helpdesk_ticket_stats']
+        with self._record_lock_order() as tables:
+            [ticket] = self._create_tickets(1, team_id=self.other_team.id)
+        self.assertEqual(ticket.user_id, self.other_agent)
+        self.assertEqual(tables, expected)
+        with self._record_lock_order() as tables:
+            ticket.write({'user_id': self.agent.id})
+        self.assertEqual(tables, expected)
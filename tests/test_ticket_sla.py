@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketSla(HelpdeskCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sla = cls.env['helpdesk.sla'].create({
+            'name': 'Test SLA',
+            'response_time': 30,
+            'resolution_time': 240,
+            'use_working_hours': False,
+        })
+        cls.other_agent = cls.env['res.users'].create({
+            'name': 'Other Test Agent',
+            'login': 'test_helpdesk_other_agent',
+            'email': 'test_helpdesk_other_agent@example.com',
+            'is_helpdesk_agent': True,
+            'helpdesk_team_ids': [Command.set(cls.team.ids)],
+            'group_ids': [Command.link(cls.env.ref('osool_helpdesk.group_helpdesk_team_member').id)],
+        })
+        cls.subcategory.write({'sla_id': cls.sla.id, 'auto_assign_user_id': cls.other_agent.id})
+
+    @freeze_time('2026-10-16 10:00:00')
+    def test_create_routed_to_another_user(self):
+        """Deadlines are created with the ticket, even when it is routed away from its creator"""
+        ticket = self.env['helpdesk.ticket'].with_user(self.agent).create({
+            'name': 'Routed ticket',
+            'partner_id': self.partner.id,
+            'request_category_id': self.category.id,
+            'request_subcategory_id': self.subcategory.id,
+        })
+        self.assertEqual(ticket.user_id, self.other_agent)
+        self.assertEqual(ticket.response_deadline, datetime(2026, 10, 16, 10, 30))
+        self.assertEqual(ticket.resolution_deadline, datetime(2026, 10, 16, 14, 0))
+        self.assertEqual(ticket.sla_deadline, ticket.resolution_deadline)
+
+    def test_pause_and_resume(self):
+        with freeze_time('2026-10-16 10:00:00'):
+            tickets = self._create_tickets(3, team_id=self.team.id)
+            tickets.write({'sla_id': self.sla.id})
+            self.assertEqual(set(tickets.mapped('resolution_deadline')), {datetime(2026, 10, 16, 14, 0)})
+        with freeze_time('2026-10-16 11:00:00'):
+            tickets.write({'status': 'pending_customer'})
+        with freeze_time('2026-10-16 12:30:00'):
+            tickets.write({'status': 'in_progress'})
+        # The 90 paused minutes move the running deadlines; the missed response deadline stays
+        self.assertFalse(any(tickets.mapped('sla_paused_since')))
+        self.assertEqual(set(tickets.mapped('response_deadline')), {datetime(2026, 10, 16, 10, 30)})
+        self.assertEqual(set(tickets.mapped('resolution_deadline')), {datetime(2026, 10, 16, 15, 30)})
+
+    def test_breach_survives_resolution(self):
+        with freeze_time('2026-10-16 10:00:00'):
+            ticket = self._create_tickets(1, team_id=self.team.id)
+            ticket.write({'sla_id': self.sla.id})
+            self.assertFalse(ticket.sla_failed)
+        with freeze_time('2026-10-16 15:00:00'):
+            ticket.write({'sla_deadline': datetime(2026, 10, 16, 14, 30)})
+            self.assertTrue(ticket.sla_failed)
+            ticket.write({'status': 'resolved'})
+        ticket.invalidate_recordset(['sla_failed'])
+        self.assertTrue(ticket.sla_failed, "Resolving a breached ticket keeps the breach")
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+from odoo import Command
+from odoo.tests import tagged
+
+from .common import HelpdeskCommon
+
+
+@tagged('post_install', '-at_install')
+class TestTicketStats(HelpdeskCommon):
+
+    def _rollup(self):
+        Stats = self.env['helpdesk.ticket.stats']
+        Stats.invalidate_model()
+        return sorted(
+            (row.site_id.id, row.team_department_id.id, row.partner_id.id, row.user_id.id,
+             row.stage_fold, row.status, row.ticket_count)
+            for row in Stats.search([])
+        )
+
+    def test_incremental_matches_rebuild(self):
+        stage = self.env['helpdesk.stage'].create({'name': 'Test Stage'})
+        tickets = self._create_tickets(5, team_department_id=self.department.id)
+        tickets[:3].write({'stage_id': stage.id})
+        tickets[0].write({'status': 'closed'})
+        stage.write({'fold': True})
+        tickets[4].unlink()
+        incremental = self._rollup()
+        self.assertFalse(self.env['helpdesk.ticket.stats'].search([('ticket_count', '<=', 0)]),
+                         "Rows whose count reaches 0 are pruned")
+        self.env['helpdesk.ticket.stats']._rebuild()
+        self.assertEqual(self._rollup(), incremental)
+
+    def test_stage_fold_moves_counts(self):
+        stage = self.env['helpdesk.stage'].create({'name': 'Test Stage'})
+        self._create_tickets(4, team_department_id=self.department.id, stage_id=stage.id)
+        stage.write({'fold': True})
+        self.assertEqual(self.department.closed_ticket_count, 4)
+        self.department.invalidate_recordset()
+        stage.write({'fold': False})
+        self.assertEqual(self.department.open_ticket_count, 4)
+
+    def test_counts_follow_record_rules(self):
+        other = self.env['res.partner'].create({'name': 'Other Customer', 'email': 'other@example.com'})
+        self._create_tickets(3, request_category_id=self.category.id)
+        self._create_tickets(2, request_category_id=self.category.id, partner_id=other.id)
+        portal_user = self.env['res.users'].create({
+            'name': 'Test Portal',
+            'login': 'test_helpdesk_portal',
+            'partner_id': self.partner.id,
+            'group_ids': [Command.set([self.env.ref('base.group_portal').id])],
+        })
+        self.assertEqual(self.category.sudo().ticket_count, 5)
+        self.category.invalidate_recordset()
+        self.assertEqual(self.category.with_user(portal_user).ticket_count, 3,
+                         "Users restricted by ticket record rules only count the tickets they can read")
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from .email_content import sanitize_email_content, iter_sanitize_email_content
+from .business_hours import WorkingCalendar, ContinuousCalendar
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Business-hours arithmetic for SLA deadlines
+
+A ``WorkingCalendar`` compiles a weekly working-hours pattern, minus holidays,
+into a table of UTC working intervals with their cumulative duration. Adding
+working minutes to a moment, or measuring the working time between two
+moments, is then a binary search in that table. The table is compiled lazily,
+a few weeks at a time, as far ahead as the deadlines require.
+
+All datetimes are naive UTC, like Odoo ``Datetime`` values.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time, timedelta
+
+import pytz
+
+# Days compiled at once when the table has to grow
+COMPILE_DAYS = 28
+
+
+def _hour_to_time(hour):
+    minutes = round(hour * 60)
+    return time(minutes // 60, minutes % 60)
+
+
+class WorkingCalendar:
+    """Working intervals of one team.
+
+    :param tz: timezone name the working hours are expressed in
+    :param hour_from: start of the working day, in hours (e.g. 8.5 for 08:30)
+    :param hour_to: end of the working day; smaller than ``hour_from`` for an
+        overnight shift, which then belongs to the weekday it starts on; equal to
+        ``hour_from`` for a 24-hour day
+    :param weekdays: working weekdays, Monday being 0
+    :param origin: earliest moment the calendar will be asked about
+    :param holidays: (start, end) UTC datetimes without working time
+    """
+
+    def __init__(self, tz, hour_from, hour_to, weekdays, origin, holidays=()):
+        self.tz = pytz.timezone(tz or 'UTC')
+        self.time_from = _hour_to_time(hour_from % 24)
+        self.length = timedelta(hours=(hour_to - hour_from) % 24 or 24)
+        self.weekdays = frozenset(weekdays)
+        self.holidays = self._merge(holidays)
+        # Start one day early so that an overnight shift running at origin is included
+        self._next_day = pytz.utc.localize(origin).astimezone(self.tz).date() - timedelta(days=1)
+        self._starts = []
+        self._ends = []
+        # Working seconds before each interval, and up to the end of each interval
+        self._cumul_starts = []
+        self._cumul_ends = []
+        if not self.weekdays:
+            raise ValueError("A working calendar needs at least one working day")
+
+    @staticmethod
+    def _merge(intervals):
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            elif start < end:
+                merged.append((start, end))
+        return merged
+
+    def _compile(self, days=COMPILE_DAYS):
+        """Append the working intervals of the next days to the table"""
+        total = self._cumul_ends[-1] if self._cumul_ends else 0
+        for offset in range(days):
+            day = self._next_day + timedelta(days=offset)
+            if day.weekday() not in self.weekdays:
+                continue
+            local_start = self.tz.localize(datetime.combine(day, self.time_from))
+            start = local_start.astimezone(pytz.utc).replace(tzinfo=None)
+            end = self.tz.normalize(local_start + self.length).astimezone(pytz.utc).replace(tzinfo=None)
+            for start, end in self._subtract_holidays(start, end):
+                if self._ends and start < self._ends[-1]:
+                    # Overlaps the previous interval (24-hour days): merge them
+                    total -= (self._ends[-1] - self._starts[-1]).total_seconds()
+                    start = self._starts.pop()
+                    end = max(end, self._ends.pop())
+                    self._cumul_starts.pop()
+                    self._cumul_ends.pop()
+                self._starts.append(start)
+                self._ends.append(end)
+                self._cumul_starts.append(total)
+                total += (end - start).total_seconds()
+                self._cumul_ends.append(total)
+        self._next_day += timedelta(days=days)
+
+    def _subtract_holidays(self, start, end):
+        index = bisect_right(self.holidays, (start,)) - 1
+        for holiday_start, holiday_end in self.holidays[max(index, 0):]:
+            if holiday_start >= end:
+                break
+            if holiday_end <= start:
+                continue
+            if holiday_start > start:
+                yield start, holiday_start
+            start = max(start, holiday_end)
+            if start >= end:
+                return
+        yield start, end
+
+    def _ensure(self, moment):
+        while not self._ends or self._ends[-1] <= moment:
+            self._compile()
+
+    def _position(self, moment):
+        """Working seconds between the calendar origin and moment"""
+        self._ensure(moment)
+        index = bisect_right(self._starts, moment) - 1
+        if index < 0:
+            return 0
+        return self._cumul_starts[index] + (min(moment, self._ends[index]) - self._starts[index]).total_seconds()
+
+    def add_minutes(self, start, minutes):
+        """Moment reached after working the given minutes from start"""
+        if minutes <= 0:
+            return start
+        target = self._position(start) + minutes * 60
+        while self._cumul_ends[-1] < target:
+            self._compile()
+        index = bisect_left(self._cumul_ends, target)
+        return self._starts[index] + timedelta(seconds=target - self._cumul_starts[index])
+
+    def working_minutes(self, start, end):
+        """Working minutes between start and end (negative if end is before start)"""
+        return (self._position(end) - self._position(start)) / 60
+
+
+class ContinuousCalendar:
+    """Calendar where every minute is worked (SLAs not using working hours)"""
+
+    def add_minutes(self, start, minutes):
+        return start + timedelta(minutes=max(minutes, 0))
+
+    def working_minutes(self, start, end):
+        return (end - start).total_seconds() / 60
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Cleanup of the email content received with channel tickets (Genesys, integrations)
+
+The content arrives URL-encoded and with markdown-like formatting characters.
+It is decoded, stripped of those characters and its line breaks are turned
+into HTML. The work is done on UTF-8 bytes, chunk by chunk, with C-level
+primitives only (``unquote_to_bytes``, ``bytes.translate``), so large bodies
+never hold more than one chunk of intermediate copies in memory.
+"""
+import codecs
+import re
+from urllib.parse import unquote_to_bytes
+
+# Formatting characters removed from the content
+STRIPPED_CHARACTERS = b'"*_~`=+-'
+
+# Largest content kept, in bytes of source; the rest is dropped
+EMAIL_CONTENT_MAX_SIZE = 2 * 1024 * 1024
+
+TRUNCATED_MARKER = '<br/>[content truncated]'
+
+CHUNK_SIZE = 64 * 1024
+
+# End of a chunk that may continue in the next one: a run of percent escapes,
+# possibly incomplete or encoding a multi-byte character
+_CHUNK_TAIL_RE = re.compile(rb'(?:%[0-9A-Fa-f]{0,2})+$')
+
+
+def _strip_bytes(data):
+    if b'%' in data:
+        data = unquote_to_bytes(data)
+    return data.translate(None, STRIPPED_CHARACTERS)
+
+
+def _convert_line_breaks(data):
+    return data.replace(b'\r\n', b'<br/>').replace(b'\n', b'<br/>')
+
+
+def iter_sanitize_email_content(chunks, max_size=EMAIL_CONTENT_MAX_SIZE):
+    """Sanitize content given as an iterable of str or bytes chunks; yields str chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')('replace')
+    # Undecoded end of the previous chunk, and a stripped CR that may pair with the next LF
+    carry = b''
+    held_cr = b''
+    remaining = max_size
+    truncated = False
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if max_size and len(chunk) >= remaining:
+            chunk = chunk[:remaining]
+            truncated = True
+        remaining -= len(chunk)
+        data = carry + chunk
+        tail = _CHUNK_TAIL_RE.search(data, max(0, len(data) - 16))
+        cut = tail.start() if tail else len(data)
+        carry = data[cut:]
+        data = held_cr + _strip_bytes(data[:cut])
+        held_cr = b'\r' if data.endswith(b'\r') else b''
+        yield decoder.decode(_convert_line_breaks(data[:len(data) - len(held_cr)]))
+        if truncated:
+            break
+    yield decoder.decode(_convert_line_breaks(held_cr + _strip_bytes(carry)), final=True)
+    if truncated:
+        yield TRUNCATED_MARKER
+
+
+def sanitize_email_content(content, max_size=EMAIL_CONTENT_MAX_SIZE):
+    """Decode, strip formatting characters and convert line breaks of an email body"""
+    if not content:
+        return content
+    chunks = (content[index:index + CHUNK_SIZE] for index in range(0, len(content), CHUNK_SIZE))
+    return ''.join(iter_sanitize_email_content(chunks, max_size=max_size))